@@ -0,0 +1,296 @@
+import argparse
+import math
+import multiprocessing
+import random
+from statistics import NormalDist
+from BitBoard import BitBoard
+from MCTS import MCTS, game_seed, other_player
+from NodeMCTS import NodeMCTS
+from OpeningBook import enumerate_positions
+from Policy import heuristic_playout
+from PUCTMCTS import PUCTMCTS
+
+MODELS = {}  # decision trees loaded by the current process, by path
+
+
+class Engine:
+    def __init__(self, name, kind="mcts", simulation_limit=1000, time_limit=None, c=1.4, rollout="random",
+                 model_path=None):
+        """
+        Describes a player configuration. Engines are plain data so they can be sent to worker processes.
+
+        Parameters:
+        - name: Name shown in reports.
+        - kind: "mcts" (UCT search), "puct" (PUCTMCTS) or "tree" (decision tree player).
+        - simulation_limit, time_limit: Search budget per move.
+        - c: Exploration constant of the UCT formula ("mcts" only).
+        - rollout: "random" or "heuristic" (Policy.heuristic_playout).
+        - model_path: Decision tree model file ("tree" only, default: Connect4.DT_MODEL_PATH).
+        """
+        if kind not in ("mcts", "puct", "tree"):
+            raise ValueError("kind must be 'mcts', 'puct' or 'tree'.")
+        if rollout not in ("random", "heuristic"):
+            raise ValueError("rollout must be 'random' or 'heuristic'.")
+        self.name = name
+        self.kind = kind
+        self.simulation_limit = simulation_limit
+        self.time_limit = time_limit
+        self.c = c
+        self.rollout = rollout
+        self.model_path = model_path
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Builds an engine from a description such as "mcts:sims=2000,c=1.0,rollout=heuristic",
+        "puct:sims=500" or "tree" (keys: sims, time, c, rollout, model, name).
+        """
+        kind, _, options = text.partition(":")
+        params = {"name": text, "kind": kind}
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key == "sims":
+                params["simulation_limit"] = int(value)
+            elif key == "time":
+                params["time_limit"] = float(value)
+            elif key == "c":
+                params["c"] = float(value)
+            elif key in ("rollout", "name"):
+                params[key] = value
+            elif key == "model":
+                params["model_path"] = value
+            else:
+                raise ValueError(f"Unknown engine option {key!r}.")
+        return cls(**params)
+
+    def choose_move(self, agents, game, player, seed):
+        """
+        Returns the column the engine plays for player on game. Search agents are kept
+        in agents between moves of the same game so their subtree is reused.
+        """
+        if self.kind == "tree":
+            import Connect4
+            path = self.model_path or Connect4.DT_MODEL_PATH
+            if path not in MODELS:
+                MODELS[path] = Connect4.load_tree_model(path)
+            return Connect4.tree_move(MODELS[path], game, player)
+
+        mcts = agents.get(player)
+        if mcts is None:
+            rollout = heuristic_playout if self.rollout == "heuristic" else None
+            if self.kind == "puct":
+                mcts = PUCTMCTS(NodeMCTS(game, None), player, self.simulation_limit, self.time_limit,
+                                seed=seed, rollout=rollout)
+            else:
+                mcts = MCTS(NodeMCTS(game, None), player, self.simulation_limit, self.time_limit,
+                            seed=seed, rollout=rollout, c=self.c)
+            agents[player] = mcts
+        else:
+            mcts.update_root(game)
+        return mcts.best_move().move
+
+    def __repr__(self):
+        return f"Engine({self.name!r})"
+
+
+def opening_suite(plies=2):
+    """
+    Returns the move sequences of all distinct (up to mirroring) positions after exactly plies moves.
+    """
+    return [moves for moves in enumerate_positions(plies) if len(moves) == plies]
+
+
+def play_game(job):
+    """
+    Plays one game between two engines from an opening in a worker process.
+
+    Parameters:
+    - job: A (game id, engine A, engine B, opening moves, whether A plays first, seed) tuple.
+      The first player is "X"; the opening moves are played before the engines take over.
+
+    Returns:
+    - The game id and the score of engine A (1 win, 0.5 draw, 0 loss).
+    """
+    game_id, engine_a, engine_b, opening, a_first, seed = job
+    rng = random.Random(seed)
+    game = BitBoard()
+    player = "X"
+    for col in opening:
+        game.make_move(col, player)
+        player = other_player(player)
+
+    engines = {"X": engine_a, "O": engine_b} if a_first else {"X": engine_b, "O": engine_a}
+    agents = {"X": {}, "O": {}}
+    while not game.is_board_full():
+        move = engines[player].choose_move(agents[player], game, player, rng.getrandbits(32))
+        game.make_move(move, player)
+        if game.is_won(move, player):
+            return game_id, 1.0 if player == ("X" if a_first else "O") else 0.0
+        player = other_player(player)
+    return game_id, 0.5
+
+
+def elo_from_score(score):
+    """
+    Converts an expected score into an Elo difference.
+    """
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo):
+    """
+    Converts an Elo difference into an expected score.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class MatchResult:
+    def __init__(self, engine_a, engine_b):
+        """
+        Running result of a match, from engine A's point of view.
+        """
+        self.engine_a = engine_a
+        self.engine_b = engine_b
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.sprt_decision = None  # "H0" (no gain), "H1" (gain) or None while undecided
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def add(self, score):
+        """
+        Records the score of one game.
+        """
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def score_variance(self) -> float:
+        """
+        Returns the variance of the score of one game.
+        """
+        if not self.games:
+            return 0.0
+        w, d, l = self.wins / self.games, self.draws / self.games, self.losses / self.games
+        return w * (1 - self.score) ** 2 + d * (0.5 - self.score) ** 2 + l * self.score ** 2
+
+    def elo(self) -> float:
+        return elo_from_score(self.score)
+
+    def smoothed_score(self):
+        """
+        Returns the score and the variance of the score of one game with one pseudo game
+        shared between a win, a draw and a loss, so that a one-sided result still has a variance.
+        """
+        w, d, l = self.wins + 1 / 3, self.draws + 1 / 3, self.losses + 1 / 3
+        n = w + d + l
+        score = (w + 0.5 * d) / n
+        return score, (w * (1 - score) ** 2 + d * (0.5 - score) ** 2 + l * score ** 2) / n
+
+    def elo_interval(self, confidence=0.95):
+        """
+        Returns the (low, high) Elo difference bounds of the normal-approximation confidence interval,
+        computed on the smoothed score so that it stays finite and wide after only wins or only losses.
+        """
+        if not self.games:
+            return -math.inf, math.inf
+        score, variance = self.smoothed_score()
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance / self.games)
+        return elo_from_score(score - margin), elo_from_score(score + margin)
+
+    def llr(self, elo0, elo1) -> float:
+        """
+        Returns the log-likelihood ratio of H1 (A is elo1 stronger) against H0 (A is elo0 stronger),
+        with the normal approximation of the game scores used by engine testing frameworks.
+        """
+        if not self.games:
+            return 0.0
+        score, variance = self.smoothed_score()
+        s0, s1 = score_from_elo(elo0), score_from_elo(elo1)
+        return (s1 - s0) * (2 * score - s0 - s1) * self.games / (2 * variance)
+
+    def __str__(self):
+        low, high = self.elo_interval()
+        text = (f"{self.engine_a.name} vs {self.engine_b.name}: +{self.wins} ={self.draws} -{self.losses} "
+                f"({self.games} games, score {self.score:.3f}), Elo {self.elo():+.1f} [{low:+.1f}, {high:+.1f}]")
+        if self.sprt_decision is not None:
+            text += f", SPRT accepted {self.sprt_decision}"
+        return text
+
+
+def sprt_bounds(alpha=0.05, beta=0.05):
+    """
+    Returns the (lower, upper) log-likelihood ratio bounds of Wald's sequential test.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run_match(engine_a, engine_b, games=200, openings=None, workers=None, seed=0, sprt=None, callback=None):
+    """
+    Plays a match between two engines across a process pool. Every opening is played
+    twice with the colours swapped, so neither engine profits from the side to move.
+
+    Parameters:
+    - engine_a, engine_b: The engines; results are from engine A's point of view.
+    - games: Maximum number of games (rounded up to whole pairs).
+    - openings: List of opening move sequences, cycled through (default: opening_suite(2)).
+    - workers: Number of processes (default: number of CPUs).
+    - seed: Base seed of the games.
+    - sprt: Optional (elo0, elo1, alpha, beta). The match stops as soon as the
+      sequential probability ratio test accepts H0 (A is elo0 stronger) or H1 (A is elo1 stronger).
+    - callback: Function called with the MatchResult after every game.
+
+    Returns:
+    - The MatchResult.
+    """
+    openings = openings if openings is not None else opening_suite(2)
+    pairs = -(-games // 2)
+    jobs = [(2 * i + swap, engine_a, engine_b, openings[i % len(openings)], swap == 0,
+             game_seed(seed, 2 * i + swap)) for i in range(pairs) for swap in (0, 1)]
+    result = MatchResult(engine_a, engine_b)
+    bounds = sprt_bounds(*sprt[2:]) if sprt is not None else None
+
+    with multiprocessing.Pool(workers) as pool:
+        for _, score in pool.imap_unordered(play_game, jobs):
+            result.add(score)
+            if callback is not None:
+                callback(result)
+            if bounds is not None:
+                llr = result.llr(sprt[0], sprt[1])
+                if llr <= bounds[0] or llr >= bounds[1]:
+                    result.sprt_decision = "H0" if llr <= bounds[0] else "H1"
+                    pool.terminate()  # stop the games still being played
+                    break
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a headless match between two engine configurations.")
+    parser.add_argument("engine_a", help='e.g. "mcts:sims=2000,c=1.0" or "puct:sims=500,rollout=heuristic"')
+    parser.add_argument("engine_b", help='e.g. "mcts:sims=2000" or "tree"')
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=2, help="length of the openings of the suite")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"),
+                        help="stop early with an SPRT of H0: elo0 against H1: elo1")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args()
+
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+    match = run_match(Engine.parse(args.engine_a), Engine.parse(args.engine_b), args.games,
+                      opening_suite(args.plies), args.workers, args.seed, sprt,
+                      callback=lambda result: print(f"\r{result}", end="", flush=True))
+    print(f"\n{match}")
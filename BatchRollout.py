@@ -0,0 +1,97 @@
+import numpy as np
+from BitBoard import COLUMN_BITS, HEIGHT, WIDTH
+
+COLUMN_BASES = np.arange(WIDTH, dtype=np.int64) * COLUMN_BITS
+COLUMN_TOPS = COLUMN_BASES + HEIGHT
+SHIFTS = [np.uint64(shift) for shift in (COLUMN_BITS, 1, HEIGHT, COLUMN_BITS + 1)]
+
+
+def has_four_batch(bits):
+    """
+    Vectorized version of BitBoard.has_four over an array of uint64 bitboards.
+
+    Returns:
+    - A boolean array, True where the bitboard contains four aligned pieces.
+    """
+    won = np.zeros(bits.shape, dtype=bool)
+    for shift in SHIFTS:
+        pairs = bits & (bits >> shift)
+        won |= (pairs & (pairs >> (shift + shift))) != 0
+    return won
+
+
+def boards_to_arrays(boards):
+    """
+    Converts a list of BitBoards into the arrays used by batch_playout.
+
+    Returns:
+    - x_bits, o_bits: uint64 arrays with the pieces of each player.
+    - heights: (n, 7) array with the next free bit index of each column.
+    """
+    x_bits = np.array([board.bitboards["X"] for board in boards], dtype=np.uint64)
+    o_bits = np.array([board.bitboards["O"] for board in boards], dtype=np.uint64)
+    heights = np.array([board.heights for board in boards], dtype=np.int64)
+    return x_bits, o_bits, heights
+
+
+def batch_playout(x_bits, o_bits, heights, x_to_move, rng):
+    """
+    Plays uniformly random games from many positions at once, one ply per step
+    for the whole batch. The positions must not be finished already.
+
+    Parameters:
+    - x_bits, o_bits, heights: Arrays returned by boards_to_arrays (modified in place).
+    - x_to_move: Boolean array, True where "X" plays the next move.
+    - rng: A numpy random Generator.
+
+    Returns:
+    - An int8 array with 1 where "X" won, -1 where "O" won and 0 for ties.
+    """
+    n = len(x_bits)
+    rows = np.arange(n)
+    x_to_move = np.array(x_to_move, dtype=bool)
+    result = np.zeros(n, dtype=np.int8)
+    active = np.ones(n, dtype=bool)
+
+    while True:
+        legal = heights < COLUMN_TOPS
+        n_legal = legal.sum(axis=1)
+        active &= n_legal > 0  # full boards without a winner are ties
+        if not active.any():
+            return result
+
+        # Pick the k-th legal column of every game, k uniform in [0, n_legal)
+        k = (rng.random(n) * n_legal).astype(np.int64)
+        columns = np.argmax(legal.cumsum(axis=1) > k[:, None], axis=1)
+
+        moves = np.where(active, np.left_shift(np.uint64(1), heights[rows, columns].astype(np.uint64)), np.uint64(0))
+        heights[rows, columns] += active
+
+        x_moves = x_to_move & active
+        o_moves = ~x_to_move & active
+        x_bits |= np.where(x_moves, moves, np.uint64(0))
+        o_bits |= np.where(o_moves, moves, np.uint64(0))
+
+        x_won = x_moves & has_four_batch(x_bits)
+        o_won = o_moves & has_four_batch(o_bits)
+        result[x_won] = 1
+        result[o_won] = -1
+        active &= ~(x_won | o_won)
+        x_to_move = ~x_to_move
+
+
+def rollout_counts(board, player, n, rng):
+    """
+    Plays n random games from one BitBoard position with the given player to move.
+
+    Returns:
+    - A dict with the number of games won by "X", won by "O" and tied (".").
+    """
+    x_bits, o_bits, heights = boards_to_arrays([board])
+    x_bits = np.repeat(x_bits, n)
+    o_bits = np.repeat(o_bits, n)
+    heights = np.repeat(heights, n, axis=0)
+    result = batch_playout(x_bits, o_bits, heights, np.full(n, player == "X"), rng)
+    x_wins = int(np.count_nonzero(result == 1))
+    o_wins = int(np.count_nonzero(result == -1))
+    return {"X": x_wins, "O": o_wins, ".": n - x_wins - o_wins}
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+import Data_Generator
+from BitBoard import BitBoard
+from Board import Board
+from DecisionTree import DecisionTree
+from MCTS import MCTS, other_player
+from NodeMCTS import NodeMCTS
+from Policy import heuristic_playout
+
+# Move sequences (0-based columns, "X" first) of the reference positions, all taken from one fixed game
+REFERENCE_GAME = [5, 4, 3, 2, 3, 3, 4, 2, 3, 3, 5, 3, 2, 4, 4, 1, 5, 5, 5, 5, 2, 4, 4, 2, 2, 0, 1, 0, 6, 6]
+REFERENCE_POSITIONS = {
+    "opening": REFERENCE_GAME[:2],
+    "midgame": REFERENCE_GAME[:16],
+    "near_terminal": REFERENCE_GAME[:30],
+}
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+DATASET_PATH = os.path.join("datasets", "connect4_dataset.csv")
+SEED = 12345
+
+
+def reference_board(name, board_class=BitBoard):
+    """
+    Returns the named reference position and the player to move in it.
+    """
+    board = board_class()
+    player = "X"
+    for col in REFERENCE_POSITIONS[name]:
+        board.make_move(col, player)
+        player = other_player(player)
+    return board, player
+
+
+def best_time(function, repeat=5):
+    """
+    Runs function repeat times and returns the shortest wall-clock time, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_board(results, n=20000):
+    """
+    make_move + undo_move pairs, is_won (on the last move) and has_winner calls per second,
+    for Board and BitBoard, on the midgame position.
+    """
+    for board_class in (Board, BitBoard):
+        prefix = f"board.{board_class.__name__}"
+        board, player = reference_board("midgame", board_class)
+        moves = board.get_legal_moves()
+        last_move, last_player = REFERENCE_POSITIONS["midgame"][-1], other_player(player)
+
+        def make_undo():
+            for i in range(n):
+                board.make_move(moves[i % len(moves)], player)
+                board.undo_move()
+
+        def is_won():
+            for _ in range(n):
+                board.is_won(last_move, last_player)
+
+        def has_winner():
+            for _ in range(n):
+                board.has_winner()
+
+        results[f"{prefix}.make_undo_per_s"] = n / best_time(make_undo)
+        results[f"{prefix}.is_won_per_s"] = n / best_time(is_won)
+        results[f"{prefix}.has_winner_per_s"] = n / best_time(has_winner)
+
+
+def bench_rollouts(results, n=300):
+    """
+    Playouts per second of MCTS.simulation from every reference position,
+    with the default random rollout and with Policy.heuristic_playout.
+    """
+    for rollout_name, rollout in (("random", None), ("heuristic", heuristic_playout)):
+        for name in REFERENCE_POSITIONS:
+            board, player = reference_board(name)
+            mcts = MCTS(NodeMCTS(board, None), player, 1, seed=SEED, rollout=rollout)
+            elapsed = best_time(lambda: [mcts.simulation(mcts.root) for _ in range(n)])
+            results[f"rollout.{rollout_name}.{name}.rollouts_per_s"] = n / elapsed
+
+
+def bench_best_move(results, limits=(200, 1000, 5000)):
+    """
+    Latency of a full MCTS.best_move from every reference position at several simulation limits.
+    """
+    for name in REFERENCE_POSITIONS:
+        board, player = reference_board(name)
+        for limit in limits:
+            def search():
+                MCTS(NodeMCTS(board.copy(), None), player, limit, seed=SEED).best_move()
+            results[f"best_move.{name}.{limit}.latency_s"] = best_time(search, repeat=1 if limit >= 5000 else 5)
+
+
+def bench_generation(results, games=3, simulation_limit=200):
+    """
+    Self-play games per minute of Data_Generator (one process, seeded games).
+    """
+    elapsed = best_time(lambda: [Data_Generator.play_game(i, SEED + i, simulation_limit) for i in range(games)], 1)
+    results[f"generation.{simulation_limit}_sims.games_per_min"] = games * 60 / elapsed
+
+
+def bench_decision_tree(results, dataset_path=DATASET_PATH):
+    """
+    DecisionTree fit and predict throughput (samples per second) on the shipped dataset.
+    """
+    rows = np.loadtxt(dataset_path, dtype=str, delimiter=",", skiprows=1, encoding="utf-8-sig")
+    X, y = rows[:, :-1], rows[:, -1].astype(int)
+    tree = DecisionTree()
+    results["decision_tree.fit.samples_per_s"] = len(X) / best_time(lambda: tree.fit(X, y), repeat=1)
+    results["decision_tree.predict.samples_per_s"] = len(X) / best_time(lambda: tree.predict(X))
+    tree.compile()
+    results["decision_tree.predict_batch.samples_per_s"] = len(X) / best_time(lambda: tree.predict_batch(X))
+
+
+BENCHMARKS = {
+    "board": bench_board,
+    "rollouts": bench_rollouts,
+    "best_move": bench_best_move,
+    "generation": bench_generation,
+    "decision_tree": bench_decision_tree,
+}
+
+
+def run_benchmarks(names=None):
+    """
+    Runs the selected benchmarks (all by default) with fixed seeds.
+
+    Returns:
+    - A dict with the environment ("meta") and the measured metrics ("results").
+      Metrics named "..._per_s" or "..._per_min" are rates (higher is better), the others
+      are durations in seconds (lower is better).
+    """
+    random.seed(SEED)
+    np.random.seed(SEED)
+    results = {}
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name](results)
+    meta = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(results, baseline, tolerance=0.5):
+    """
+    Compares metrics against a baseline.
+
+    Returns:
+    - A list of (metric, baseline value, value, relative change) for the metrics that got
+      worse by more than tolerance (slower durations or lower rates).
+    """
+    regressions = []
+    for metric, value in results["results"].items():
+        reference = baseline["results"].get(metric)
+        if not reference:
+            continue
+        change = value / reference - 1
+        worse = change < -tolerance if "_per_" in metric else change > tolerance
+        if worse:
+            regressions.append((metric, reference, value, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect Four performance benchmarks.")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run, among {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (default: 0.5)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(args.benchmarks)
+    for metric, value in report["results"].items():
+        print(f"{metric:55s} {value:14.4f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for metric, reference, value, change in regressions:
+            print(f"REGRESSION {metric}: {reference:.4f} -> {value:.4f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
@@ -0,0 +1,171 @@
+import csv
+import os
+import struct
+import sys
+import numpy as np
+from BitBoard import COLUMN_BITS, HEIGHT, WIDTH
+
+MAGIC = b"C4DS"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")  # magic, version, record size, reserved
+BINARY_EXTENSION = ".c4ds"
+NO_VALUE = -128  # value of positions without a game-theoretic label
+CELL_CODES = {".": 0, "X": 1, "O": 2}  # integer of each CSV cell value in records_to_cells
+PLAYER_CODES = {"X": 0, "O": 1}  # integer of each CSV player value in the player field
+
+# One position per record: the stones of each player as a bitboard (BitBoard bit layout),
+# the player to move (0 for "X", 1 for "O"), the chosen column (0-based) and an optional value
+# (1 win, 0 draw, -1 loss for the player to move, NO_VALUE when unknown).
+RECORD_DTYPE = np.dtype([("x_bits", "<u8"), ("o_bits", "<u8"), ("player", "u1"), ("move", "i1"),
+                         ("value", "i1"), ("reserved", "u1")])
+
+# Bit of the BitBoard layout for each of the 42 cells of a flattened grid (row 0 is the top row)
+CELL_SHIFTS = np.array([col * COLUMN_BITS + (HEIGHT - 1 - row) for row in range(HEIGHT) for col in range(WIDTH)],
+                       dtype=np.uint64)
+
+
+def encode_rows(rows):
+    """
+    Converts dataset rows (42 cells of "X", "O" or ".", the player to move and the
+    1-based chosen column, as written to the CSV files) into records.
+
+    Returns:
+    - A NumPy array of RECORD_DTYPE.
+    """
+    rows = np.asarray(rows, dtype=str).reshape(-1, WIDTH * HEIGHT + 2)
+    cells = rows[:, :WIDTH * HEIGHT]
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    records["x_bits"] = np.bitwise_or.reduce((cells == "X").astype(np.uint64) << CELL_SHIFTS, axis=1)
+    records["o_bits"] = np.bitwise_or.reduce((cells == "O").astype(np.uint64) << CELL_SHIFTS, axis=1)
+    records["player"] = rows[:, -2] == "O"
+    records["move"] = rows[:, -1].astype(np.int8) - 1
+    records["value"] = NO_VALUE
+    return records
+
+
+def records_to_cells(records):
+    """
+    Expands records into a (n, 42) int8 matrix of cells (0 empty, 1 "X", 2 "O"),
+    in the same order as the cell columns of the CSV files.
+    """
+    x = (records["x_bits"][:, None] >> CELL_SHIFTS) & np.uint64(1)
+    o = (records["o_bits"][:, None] >> CELL_SHIFTS) & np.uint64(1)
+    return (x + 2 * o).astype(np.int8)
+
+
+def records_to_features(records):
+    """
+    Returns the (n, 43) int8 matrix of the features the decision trees are trained on:
+    the 42 cells of records_to_cells followed by the player to move (0 "X", 1 "O").
+    Trees fitted on the CSV files translate these integers with CELL_CODES and PLAYER_CODES.
+    """
+    return np.column_stack([records_to_cells(records), records["player"].astype(np.int8)])
+
+
+def write_header(f):
+    """
+    Writes the header of an empty dataset file.
+    """
+    f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+
+
+def read_header(f):
+    """
+    Reads and validates the header of a dataset file.
+    """
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Not a Connect Four dataset: file too short.")
+    magic, version, record_size = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("Not a Connect Four dataset: bad magic number.")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported dataset version {version} (record size {record_size}).")
+    return version
+
+
+class DatasetWriter:
+    def __init__(self, path, append=True):
+        """
+        Opens a binary dataset file for writing, creating it with a header if needed.
+
+        Parameters:
+        - path: Path of the dataset file.
+        - append: Whether to append to an existing file or overwrite it.
+        """
+        if append and os.path.isfile(path):
+            with open(path, "rb") as f:
+                read_header(f)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            write_header(self.file)
+
+    def write_records(self, records):
+        """
+        Appends an array of RECORD_DTYPE.
+        """
+        self.file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def write_rows(self, rows):
+        """
+        Appends dataset rows in the CSV layout (see encode_rows).
+        """
+        self.write_records(encode_rows(rows))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_dataset(path, mode="r"):
+    """
+    Maps a binary dataset file into memory without reading or parsing it.
+    A trailing partial record (from an interrupted write) is ignored.
+
+    Returns:
+    - A np.memmap of RECORD_DTYPE; fields such as records["move"] are views, not copies.
+    """
+    with open(path, "rb") as f:
+        read_header(f)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER.size, shape=(count,))
+
+
+def convert_csv(csv_path, binary_path, chunk_size=100000):
+    """
+    Converts a CSV dataset (42 cells, player, 1-based move, with a header row)
+    into the binary format, streaming it in chunks.
+
+    Returns:
+    - The number of positions converted.
+    """
+    total = 0
+    with open(csv_path, newline="", encoding="utf-8-sig") as csvfile, DatasetWriter(binary_path, append=False) as writer:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # header
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                writer.write_rows(chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_rows(chunk)
+            total += len(chunk)
+    return total
+
+
+if __name__ == "__main__":
+    # python BinaryDataset.py dataset.csv [dataset.c4ds]
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + BINARY_EXTENSION
+    print(f"Converted {convert_csv(source, target)} positions to {target}")
@@ -0,0 +1,245 @@
+from Board import Board
+
+WIDTH = 7
+HEIGHT = 6
+COLUMN_BITS = HEIGHT + 1  # each column keeps one empty sentinel bit on top
+
+BOTTOM_MASK = sum(1 << (col * COLUMN_BITS) for col in range(WIDTH))
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+
+
+def column_mask(col):
+    """
+    Returns the bitmask covering the playable cells of a column.
+    """
+    return ((1 << HEIGHT) - 1) << (col * COLUMN_BITS)
+
+
+def has_four(bits) -> bool:
+    """
+    Checks whether a single player's bitboard contains four aligned pieces.
+    Every direction is tested with two shift-and-mask operations.
+    """
+    for shift in (COLUMN_BITS, 1, HEIGHT, COLUMN_BITS + 1):  # horizontal, vertical, both diagonals
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+class BitBoard:
+    def __init__(self):
+        """
+        Initializes a bitboard-backed Connect Four board.
+        - Each player's pieces are stored in one integer, 7 bits per column (bottom row first).
+        - mask holds every occupied cell, heights the next free bit index of each column.
+        - Exposes the same API as Board, so both can be used interchangeably.
+        """
+        self.counter = 0
+        self.board_width = WIDTH
+        self.board_height = HEIGHT
+        self.bitboards = {"X": 0, "O": 0}
+        self.mask = 0
+        self.heights = [col * COLUMN_BITS for col in range(WIDTH)]
+        self.last_move_column = None
+        self.history = []
+
+    @classmethod
+    def from_grid(cls, grid, last_move_column=None):
+        """
+        Builds a bitboard from the list-of-lists grid used by Board (row 0 is the top row).
+        """
+        bitboard = cls()
+        for col in range(WIDTH):
+            for y in range(HEIGHT - 1, -1, -1):
+                cell = grid[y][col]
+                if cell == ".":
+                    break
+                bitboard.make_move(col, cell)
+        bitboard.last_move_column = last_move_column
+        bitboard.history = []
+        return bitboard
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Converts a Board into an equivalent BitBoard.
+        The move history is replayed when it is available, so undo_move keeps working.
+        """
+        if len(board.history) != board.counter:
+            return cls.from_grid(board.board, board.last_move_column)
+        bitboard = cls()
+        rows = [HEIGHT - 1] * WIDTH
+        for x in board.history:
+            bitboard.make_move(x, board.board[rows[x]][x])
+            rows[x] -= 1
+        return bitboard
+
+    def to_board(self) -> Board:
+        """
+        Converts this bitboard back into a list-of-lists Board.
+        """
+        board = Board()
+        board.board = self.to_grid()
+        board.counter = self.counter
+        board.last_move_column = self.last_move_column
+        board.history = list(self.history)
+        for col in range(WIDTH):
+            board.y_coords[col] = HEIGHT - 1 - (self.heights[col] - col * COLUMN_BITS)
+        return board
+
+    def to_grid(self):
+        """
+        Returns the board as a 6x7 list of lists of "X", "O" and "." (row 0 is the top row).
+        """
+        grid = [list(".......") for _ in range(HEIGHT)]
+        for player, bits in self.bitboards.items():
+            while bits:
+                low = bits & -bits
+                index = low.bit_length() - 1
+                col, row = divmod(index, COLUMN_BITS)
+                grid[HEIGHT - 1 - row][col] = player
+                bits ^= low
+        return grid
+
+    @property
+    def board(self):
+        """
+        Grid view of the position, kept for printing and CSV export.
+        """
+        return self.to_grid()
+
+    def key(self) -> int:
+        """
+        Returns a compact integer that uniquely identifies the position (useful for hashing).
+        """
+        return self.bitboards["X"] + self.mask
+
+    def to_tuple(self):
+        """
+        Returns an immutable representation of the board (useful for hashing).
+        """
+        return tuple(tuple(row) for row in self.board)
+
+    def copy(self):
+        """
+        Returns an independent copy of the board without going through deepcopy.
+        """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.counter = self.counter
+        new_board.board_width = self.board_width
+        new_board.board_height = self.board_height
+        new_board.bitboards = dict(self.bitboards)
+        new_board.mask = self.mask
+        new_board.heights = list(self.heights)
+        new_board.last_move_column = self.last_move_column
+        new_board.history = list(self.history)
+        return new_board
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def get_simulation_board(self):
+        """
+        Placeholder for compatibility or extensions (e.g., for neural network input).
+        """
+        return []
+
+    def print_board(self):
+        """
+        Displays the board to the console.
+        """
+        print("\n" + " ".join(map(str, [1, 2, 3, 4, 5, 6, 7])))
+        for row in self.board:
+            print(" ".join(row))
+        print()
+
+    def is_empty(self, x, y) -> bool:
+        """
+        Checks if a given cell is empty (y = 0 is the top row, as in Board).
+        """
+        return not self.mask & (1 << (x * COLUMN_BITS + HEIGHT - 1 - y))
+
+    def is_board_full(self) -> bool:
+        """
+        Checks if the board is full (42 moves).
+        """
+        return self.counter == WIDTH * HEIGHT
+
+    def is_legal_move(self, x) -> bool:
+        """
+        Checks if a move is legal:
+        - Column must be within bounds.
+        - Column must not be full.
+        """
+        if not 0 <= x < WIDTH:
+            return False
+        return self.heights[x] < x * COLUMN_BITS + HEIGHT
+
+    def get_legal_moves(self):
+        """
+        Returns the list of columns where a piece can currently be played, e.g. [0, 2, 3, 5, 6].
+        """
+        return [x for x in range(WIDTH) if self.heights[x] < x * COLUMN_BITS + HEIGHT]
+
+    def legal_moves_mask(self) -> int:
+        """
+        Returns a bitmask with the next free cell of every playable column set.
+        """
+        return (self.mask + BOTTOM_MASK) & BOARD_MASK
+
+    def make_move(self, x, current_player):
+        """
+        Places a piece from the current player in the specified column.
+        Updates the bitboards, move counter, and last played column.
+        """
+        move = 1 << self.heights[x]
+        self.bitboards[current_player] |= move
+        self.mask |= move
+        self.heights[x] += 1
+        self.counter += 1
+        self.last_move_column = x
+        self.history.append(x)
+
+    def undo_move(self):
+        """
+        Reverts the last move made on the board.
+        Used by search code to apply and revert moves in place instead of copying the board.
+        """
+        x = self.history.pop()
+        self.heights[x] -= 1
+        move = 1 << self.heights[x]
+        player = "X" if self.bitboards["X"] & move else "O"
+        self.bitboards[player] ^= move
+        self.mask ^= move
+        self.counter -= 1
+        self.last_move_column = self.history[-1] if self.history else None
+
+    def is_won(self, x, current_player) -> bool:
+        """
+        Checks whether the last move in column x resulted in a win.
+        """
+        return has_four(self.bitboards[current_player])
+
+    def has_winner(self) -> bool:
+        """
+        Checks if any player has a winning sequence on the board.
+        """
+        return any(has_four(bits) for bits in self.bitboards.values())
+
+    def is_tie(self) -> bool:
+        """
+        Returns True if the board is full and there is no winner.
+        """
+        return self.is_board_full() and not self.has_winner()
+
+    def get_possible_moves(self, current_player):
+        """
+        Returns a list of possible future board states given the current player's move.
+        """
+        possible_boards = []
+        for i in self.get_legal_moves():
+            new_board = self.copy()
+            new_board.make_move(i, current_player)
+            possible_boards.append(new_board)
+        return possible_boards
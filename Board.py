@@ -13,6 +13,7 @@ class Board:
         self.board = [list(".......") for _ in range(self.board_height)]
         self.y_coords = {col: self.board_height - 1 for col in range(self.board_width)}
         self.last_move_column = None
+        self.history = []
 
     def to_tuple(self):
         """
@@ -20,6 +21,21 @@ class Board:
         """
         return tuple(tuple(row) for row in self.board)
 
+    def key(self) -> int:
+        """
+        Returns a compact integer that uniquely identifies the position,
+        identical to BitBoard.key() for the same position.
+        """
+        key = 0
+        for x in range(self.board_width):
+            for row in range(self.board_height):
+                cell = self.board[self.board_height - 1 - row][x]
+                if cell == ".":
+                    break
+                bit = 1 << (x * (self.board_height + 1) + row)
+                key += 2 * bit if cell == "X" else bit
+        return key
+
     def get_simulation_board(self):
         """
         Placeholder for compatibility or extensions (e.g., for neural network input).
@@ -71,6 +87,24 @@ class Board:
         self.counter += 1
         self.y_coords[x] -= 1
         self.last_move_column = x
+        self.history.append(x)
+
+    def undo_move(self):
+        """
+        Reverts the last move made on the board.
+        Used by search code to apply and revert moves in place instead of copying the board.
+        """
+        x = self.history.pop()
+        self.y_coords[x] += 1
+        self.board[self.y_coords[x]][x] = "."
+        self.counter -= 1
+        self.last_move_column = self.history[-1] if self.history else None
+
+    def get_legal_moves(self):
+        """
+        Returns the list of columns where a piece can currently be played, e.g. [0, 2, 3, 5, 6].
+        """
+        return [x for x in range(self.board_width) if self.is_legal_move(x)]
 
     def count_in_direction(self, current_player, dx, dy, x, y):
         """
@@ -133,12 +167,11 @@ class Board:
     def get_possible_moves(self, current_player):
         """
         Returns a list of possible future board states given the current player's move.
-        Useful for MCTS simulation.
+        Copies the board once per move; search code should use get_legal_moves and undo_move instead.
         """
         possible_boards = []
-        for i in range(self.board_width):
-            if self.is_legal_move(i):
-                new_board = deepcopy(self)   # NOT USE DEEP COPY, RETURN POSSIBLE MOVES INSTEAD, I.E. [1,3,4,5,6]
-                new_board.make_move(i, current_player)
-                possible_boards.append(new_board)
+        for i in self.get_legal_moves():
+            new_board = deepcopy(self)
+            new_board.make_move(i, current_player)
+            possible_boards.append(new_board)
         return possible_boards
@@ -0,0 +1,240 @@
+import json
+import struct
+import numpy as np
+from BinaryDataset import CELL_CODES, PLAYER_CODES
+from BitBoard import HEIGHT, WIDTH
+
+MAGIC = b"C4DT"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxI")  # magic, version, length of the JSON description
+ALIGNMENT = 64  # arrays start on 64-byte boundaries so they can be memory-mapped
+NO_LABEL = -1  # value of internal nodes, and of the node reached through a missing branch
+
+
+class CompiledTree:
+    def __init__(self, feature, children, value, classes, feature_values):
+        """
+        A trained decision tree flattened into NumPy arrays, for fast prediction.
+        Node 0 is the root and the last node is a sentinel leaf without label,
+        reached when a sample has a value that no training sample had at that node.
+
+        Parameters:
+        - feature: (n_nodes,) feature tested by each node, -1 for leaves.
+        - children: (n_nodes, n_codes) child of each node for each value code; the last
+          code stands for values unseen during training.
+        - value: (n_nodes,) index in classes of the label of each leaf (NO_LABEL otherwise).
+        - classes: List of the labels.
+        - feature_values: For each feature, the sorted list of values seen during training
+          (the code of a value is its index in that list).
+        """
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.children = np.asarray(children, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.int32)
+        self.classes = list(classes)
+        self.feature_values = [list(values) for values in feature_values]
+        self.unseen = self.children.shape[1] - 1
+        self.lookup = self.build_lookup()
+        self.lists = None  # plain Python copies of the arrays for predict_one, built on first use
+
+    @classmethod
+    def from_tree(cls, root, classes, feature_values):
+        """
+        Compiles a tree of NodeDT objects, numbering the nodes breadth first.
+        """
+        n_codes = max(len(values) for values in feature_values) + 1
+        class_index = {label: i for i, label in enumerate(classes)}
+        nodes = [root]
+        feature, children, value = [], [], []
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            row = [None] * n_codes
+            if node.is_leaf():
+                feature.append(-1)
+                value.append(class_index[node.value])
+            else:
+                feature.append(node.feature)
+                value.append(NO_LABEL)
+                codes = {v: code for code, v in enumerate(feature_values[node.feature])}
+                for v, child in node.children.items():
+                    row[codes[v]] = len(nodes)
+                    nodes.append(child)
+            children.append(row)
+            i += 1
+
+        sentinel = len(nodes)
+        feature.append(-1)
+        value.append(NO_LABEL)
+        children.append([None] * n_codes)
+        children = [[sentinel if child is None else child for child in row] for row in children]
+        return cls(feature, children, value, classes, feature_values)
+
+    def __len__(self):
+        return len(self.feature)
+
+    def encode(self, X):
+        """
+        Converts raw feature values into value codes (unseen values get the last code).
+        Integer inputs, such as BinaryDataset.records_to_features, go through a lookup table.
+        """
+        X = np.asarray(X)
+        if X.dtype.kind in "iu" and self.lookup is None:
+            raise ValueError("Integer features given to a tree whose training values have no integer encoding.")
+        if X.dtype.kind in "iu":
+            clipped = np.clip(X, -1, self.lookup.shape[1] - 1)  # values out of range map to -1: unseen
+            return self.lookup[np.arange(X.shape[1]), clipped]
+        codes = np.empty(X.shape, dtype=np.int32)
+        for f, values in enumerate(self.feature_values):
+            values = np.asarray(values)
+            column = X[:, f]
+            idxs = np.minimum(np.searchsorted(values, column), len(values) - 1)
+            codes[:, f] = np.where(values[idxs] == column, idxs, self.unseen)
+        return codes
+
+    def build_lookup(self):
+        """
+        Returns the (n_features, max_value + 2) table mapping small non-negative integer
+        values to their codes (last column for -1 / out of range), or None when the
+        training values have no integer form. Trees trained on the CSV files (42 cells
+        of ".", "X" or "O" and the player) use the integers of the binary dataset,
+        CELL_CODES for the cells and PLAYER_CODES for the player.
+        """
+        all_values = [v for values in self.feature_values for v in values]
+        if all(isinstance(v, (int, np.integer)) and 0 <= v < 4096 for v in all_values):
+            integers = [[int(v) for v in values] for values in self.feature_values]
+        elif (len(self.feature_values) == WIDTH * HEIGHT + 1
+              and all(v in CELL_CODES for values in self.feature_values[:-1] for v in values)
+              and all(v in PLAYER_CODES for v in self.feature_values[-1])):
+            integers = [[CELL_CODES[v] for v in values] for values in self.feature_values[:-1]]
+            integers.append([PLAYER_CODES[v] for v in self.feature_values[-1]])
+        else:
+            return None
+        lookup = np.full((len(integers), max(v for values in integers for v in values) + 2), self.unseen,
+                         dtype=np.int32)
+        for f, values in enumerate(integers):
+            lookup[f, values] = np.arange(len(values))
+        return lookup
+
+    def predict_codes(self, codes, chunk_size=65536):
+        """
+        Predicts the class index of every row of an encoded matrix, level by level:
+        at each step all samples still at an internal node move to their child at once.
+        Rows are processed in chunks that stay in cache.
+
+        Returns:
+        - An int32 array of indices into classes (NO_LABEL where a branch was missing).
+        """
+        result = np.empty(len(codes), dtype=np.int32)
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start:start + chunk_size]
+            nodes = np.zeros(len(chunk), dtype=np.int32)
+            rows = np.arange(len(chunk))
+            while len(rows):
+                features = self.feature[nodes[rows]]
+                internal = features >= 0
+                rows, features = rows[internal], features[internal]
+                nodes[rows] = self.children[nodes[rows], chunk[rows, features]]
+            result[start:start + len(chunk)] = self.value[nodes]
+        return result
+
+    def predict_batch(self, X, missing=None, chunk_size=65536):
+        """
+        Predicts the labels of all samples of X (raw values, same columns as in training).
+
+        Parameters:
+        - X: 2D array or DataFrame of samples.
+        - missing: Label returned for samples that reach a branch never seen in training.
+        - chunk_size: Number of samples encoded and evaluated at a time.
+        """
+        X = np.asarray(X)
+        predicted = np.empty(len(X), dtype=np.int32)
+        for start in range(0, len(X), chunk_size):
+            predicted[start:start + chunk_size] = self.predict_codes(self.encode(X[start:start + chunk_size]))
+        labels = np.asarray(self.classes)
+        if (predicted == NO_LABEL).any():
+            labels = np.append(labels.astype(object), missing)  # index -1 selects missing
+        return labels[predicted]
+
+    def predict_one(self, x):
+        """
+        Predicts the label of one sample (a sequence of raw feature values)
+        with plain integer lookups, without building any array.
+        Returns None if the sample reaches a branch never seen in training.
+        """
+        if self.lists is None:
+            self.lists = (self.feature.tolist(), self.children.ravel().tolist(), self.value.tolist(),
+                          [{v: code for code, v in enumerate(values)} for values in self.feature_values])
+        feature, children, value, codes = self.lists
+        width, unseen = self.unseen + 1, self.unseen
+        node = 0
+        f = feature[0]
+        while f >= 0:
+            node = children[node * width + codes[f].get(x[f], unseen)]
+            f = feature[node]
+        label = value[node]
+        return None if label == NO_LABEL else self.classes[label]
+
+    def save(self, path, metadata=None):
+        """
+        Writes the tree to a versioned model file: a header, a JSON description
+        (labels, feature encoding, metadata and array layout) and the raw arrays.
+        No pickle is involved, and the arrays can be memory-mapped on load.
+
+        Parameters:
+        - path: Path of the model file.
+        - metadata: JSON-serializable dict stored with the model (e.g. training parameters).
+        """
+        arrays = {"feature": self.feature, "children": self.children, "value": self.value}
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = {"offset": offset, "shape": list(array.shape), "dtype": array.dtype.str}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        description = json.dumps({"classes": self.classes, "feature_values": self.feature_values,
+                                  "metadata": metadata or {}, "arrays": layout}).encode()
+        start = -(-(HEADER.size + len(description)) // ALIGNMENT) * ALIGNMENT
+
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(description)))
+            f.write(description)
+            for name, array in arrays.items():
+                f.seek(start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Reads a model file written by save.
+
+        Parameters:
+        - path: Path of the model file.
+        - mmap: Memory-map the arrays instead of reading them into memory.
+
+        Returns:
+        - tree: The CompiledTree.
+        - metadata: The metadata dict stored with it.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Not a decision tree model: file too short.")
+            magic, version, length = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("Not a decision tree model: bad magic number.")
+            if version != VERSION:
+                raise ValueError(f"Unsupported decision tree model version {version}.")
+            description = json.loads(f.read(length))
+            start = -(-(HEADER.size + length) // ALIGNMENT) * ALIGNMENT
+
+            arrays = {}
+            for name, layout in description["arrays"].items():
+                dtype, shape = np.dtype(layout["dtype"]), tuple(layout["shape"])
+                if mmap:
+                    arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=start + layout["offset"], shape=shape)
+                else:
+                    f.seek(start + layout["offset"])
+                    arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+        tree = cls(arrays["feature"], arrays["children"], arrays["value"], description["classes"],
+                   description["feature_values"])
+        return tree, description["metadata"]
@@ -1,48 +1,106 @@
 import time
-from Board import Board
+import multiprocessing
+import os
+from BitBoard import BitBoard
+from DecisionTree import DecisionTree
 from MCTS import MCTS
-from Node import Node
+from NodeMCTS import NodeMCTS
+from OpeningBook import OpeningBook
+from RootParallelMCTS import RootParallelMCTS
+from Solver import score_to_value
 import numpy as np
+import random
 
-def ai_vs_ai_simulation_generator(x_simulation_limit=10000, o_simulation_limit=10000):
+SOLVER_EMPTY_CELLS = 20  # hints are solved exactly from this number of empty cells down
+DT_MODEL_PATH = os.path.join("models", "connect4_tree.c4dt")
+DT_DATASET_PATH = os.path.join("datasets", "connect4_dataset.csv")
+BOOK_PATH = os.path.join("models", "opening_book.c4ob")
+BOOKS = {}  # opening books loaded so far, by path
+
+def get_opening_book(path=BOOK_PATH):
+    """
+    Returns the opening book stored at path (built with OpeningBook.py), or None if there is none.
+    The book is read once and kept for the following games and hints.
+    """
+    if path not in BOOKS:
+        BOOKS[path] = OpeningBook.load(path) if os.path.isfile(path) else None
+    return BOOKS[path]
+
+def get_agent(agents, game, current_player, simulation_limit=10000, time_limit=None, workers=None, pool=None,
+              seed=None, book=None):
+    """
+    Returns the MCTS agent of the given player, re-rooted on the current game state.
+    Agents are kept in the agents dict between moves so the subtree below the
+    position reached is reused instead of being searched again from scratch.
+    With workers > 1, a root-parallel agent searching on the given pool is used instead.
+    With a book (OpeningBook), the single-process agent plays book moves without searching.
+    """
+    mcts = agents.get(current_player)
+    if mcts is None:
+        if workers is not None and workers > 1:
+            mcts = RootParallelMCTS(NodeMCTS(game, None), current_player, simulation_limit, time_limit,
+                                    workers=workers, seed=seed, pool=pool)
+        else:
+            mcts = MCTS(NodeMCTS(game, None), current_player, simulation_limit, time_limit, seed=seed, book=book)
+        agents[current_player] = mcts
+    else:
+        mcts.update_root(game)
+    return mcts
+
+def ai_vs_ai_simulation_generator(x_simulation_limit=10000, o_simulation_limit=10000, workers=None, pool=None,
+                                  seed=None):
     """
     Simulates a Connect Four game between two AI agents using MCTS with configurable simulation limits.
+    With workers > 1 both agents run root-parallel searches on a worker pool that is
+    started once and kept for the whole game (or on the given pool, shared between games).
+    With a seed, the game is reproducible (single-process searches only).
 
     Returns:
     - boardStates: A list of flattened 1D arrays representing the state of the board at each move
     - playerTurns: A list of strings ("X" or "O") indicating the player who made each move
     - optimalMoves: A list of integers indicating the column (1-based) chosen at each move
     """
-    game = Board()
+    game = BitBoard()
     players = ["X", "O"]
+    agents = {}
     current_index = 0
     game_over = False
+    seeds = random.Random(seed)
 
     boardStates = []
     playerTurns = []
     optimalMoves = []
 
-    while not game.is_board_full() and not game_over:
-        current_player = players[current_index]
+    owns_pool = pool is None and workers is not None and workers > 1
+    if owns_pool:
+        pool = multiprocessing.Pool(workers)
 
-        sim_limit = x_simulation_limit if current_player == "X" else o_simulation_limit
-        root = Node(game, None)
-        mcts = MCTS(root, current_player, sim_limit)
-        start = time.time()
-        best_node = mcts.best_move()
-        move = best_node.board.last_move_column
-        end = time.time()
+    try:
+        while not game.is_board_full() and not game_over:
+            current_player = players[current_index]
+
+            sim_limit = x_simulation_limit if current_player == "X" else o_simulation_limit
+            mcts = get_agent(agents, game, current_player, sim_limit, workers=workers, pool=pool,
+                             seed=seeds.getrandbits(32))
+            start = time.time()
+            best_node = mcts.best_move()
+            move = best_node.move
+            end = time.time()
 
-        # Register move and state
-        flat_board = np.array(game.board).flatten().tolist()
-        boardStates.append(flat_board)
-        playerTurns.append(current_player)
-        optimalMoves.append(move + 1)  # 1-based index for readability
+            # Register move and state
+            flat_board = np.array(game.board).flatten().tolist()
+            boardStates.append(flat_board)
+            playerTurns.append(current_player)
+            optimalMoves.append(move + 1)  # 1-based index for readability
 
-        game.make_move(move, current_player)
+            game.make_move(move, current_player)
 
-        game_over = game.is_won(move, current_player)
-        current_index = 1 - current_index
+            game_over = game.is_won(move, current_player)
+            current_index = 1 - current_index
+    finally:
+        if owns_pool:
+            pool.close()
+            pool.join()
 
     return boardStates, playerTurns, optimalMoves
 
@@ -57,8 +115,10 @@ def human_play(game, current_player):
         user_input = input()
 
         if user_input.lower() == 'hint':
-            best_move = get_hint(game, current_player)
+            best_move, outcome = get_hint(game, current_player)
             print("Best move according to the AI: ", best_move)
+            if outcome is not None:
+                print(f"With perfect play this position is a {outcome} for {current_player}.")
             continue  # Ask again after showing the hint
 
         if not user_input.isdigit():
@@ -72,21 +132,66 @@ def human_play(game, current_player):
             print("Column out of range. Try again.")
 
 
-def get_hint(game, current_player):
+def get_hint(game, current_player, time_limit=None):
     """
     Uses MCTS to provide a hint for the current player.
+    With a time_limit (in seconds) the search is bounded by wall-clock time
+    instead of a simulation count and stops early once the best move is settled.
+    Near the end of the game the position is solved exactly instead,
+    and opening positions found in the opening book are answered from it.
+
+    Returns:
+    - The suggested column (1-based).
+    - The proven outcome for the current player ("win", "draw" or "loss"), or None if it was not solved.
     """
-    root = Node(game, None)
-    mcts = MCTS(root, current_player)
+    root = NodeMCTS(game, None)
+    book = get_opening_book()
+    if time_limit is None:
+        mcts = MCTS(root, current_player, solver_threshold=SOLVER_EMPTY_CELLS, book=book)
+    else:
+        mcts = MCTS(root, current_player, simulation_limit=None, time_limit=time_limit, early_stop=True,
+                    solver_threshold=SOLVER_EMPTY_CELLS, book=book)
     best_node = mcts.best_move()
-    return best_node.board.last_move_column + 1
+
+    outcome = None
+    if mcts.solved_score is not None:
+        outcome = {1: "win", 0: "draw", -1: "loss"}[score_to_value(mcts.solved_score)]
+    return best_node.move + 1, outcome
+
+
+def load_tree_model(model_path=DT_MODEL_PATH, dataset_path=DT_DATASET_PATH):
+    """
+    Loads the decision tree used by the DT player. If no saved model exists yet,
+    a tree is trained on the generated dataset and saved for the next games.
+    """
+    if os.path.isfile(model_path):
+        return DecisionTree.load(model_path)
+
+    print(f"No model found in {model_path}, training one on {dataset_path}...")
+    rows = np.loadtxt(dataset_path, dtype=str, delimiter=",", skiprows=1, encoding="utf-8-sig")
+    model = DecisionTree()
+    model.fit(rows[:, :-1], rows[:, -1].astype(int))
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    model.save(model_path)
+    return model
+
+def tree_move(model, game, current_player):
+    """
+    Returns the column (0-based) predicted by the decision tree for the current player.
+    When the tree has no prediction for the position, or predicts a full column,
+    the legal column closest to the center is played instead.
+    """
+    prediction = model.compiled.predict_one(np.array(game.board).flatten().tolist() + [current_player])
+    if prediction is not None and game.is_legal_move(int(prediction) - 1):
+        return int(prediction) - 1
+    return min(game.get_legal_moves(), key=lambda col: abs(col - 3))
 
 
 def human_vs_human():
     """
     Human vs. Human game loop.
     """
-    game = Board()
+    game = BitBoard()
     player = "X"
     game_over = False
 
@@ -110,13 +215,16 @@ def human_vs_human():
     print("It's a tie!" if game.is_tie() else f"Player {player} has won!\n")
 
 
-def ai_vs_human():
+def ai_vs_human(time_limit=None, model=None):
     """
     AI vs. Human game loop.
+    With a time_limit (in seconds) the AI thinks for a fixed time instead of a fixed number of simulations.
+    With a model (a trained DecisionTree), the AI plays the moves predicted by the tree instead of searching.
     """
-    game = Board()
+    game = BitBoard()
     ai = "O"
     human = "X"
+    agents = {}
     human_turn = False
     game_over = False
 
@@ -135,11 +243,17 @@ def ai_vs_human():
                     game.make_move(move, current_player)
                     valid_move = True
         else:
-            root = Node(game, None)
-            mcts = MCTS(root, ai)
             start = time.time()
-            best_node = mcts.best_move()
-            move = best_node.board.last_move_column
+            if model is not None:
+                move = tree_move(model, game, ai)
+            else:
+                if time_limit is None:
+                    mcts = get_agent(agents, game, ai, book=get_opening_book())
+                else:
+                    mcts = get_agent(agents, game, ai, simulation_limit=None, time_limit=time_limit,
+                                     book=get_opening_book())
+                best_node = mcts.best_move()
+                move = best_node.move
             game.make_move(move, ai)
             end = time.time()
             print(f"AI chose column: {move + 1}\nTime taken: {end - start:.2f}s")
@@ -154,8 +268,9 @@ def ai_vs_ai(x_simulation_limit=10000, o_simulation_limit=10000):
     """
     AI vs. AI game loop.
     """
-    game = Board()
+    game = BitBoard()
     players = ["X", "O"]
+    agents = {}
     current_index = 0
     game_over = False
 
@@ -165,11 +280,10 @@ def ai_vs_ai(x_simulation_limit=10000, o_simulation_limit=10000):
         print(f"It is now {current_player}'s turn!")
 
         sim_limit = x_simulation_limit if current_player == "X" else o_simulation_limit
-        root = Node(game, None)
-        mcts = MCTS(root, current_player, sim_limit)
+        mcts = get_agent(agents, game, current_player, sim_limit, book=get_opening_book())
         start = time.time()
         best_node = mcts.best_move()
-        move = best_node.board.last_move_column
+        move = best_node.move
         game.make_move(move, current_player)
         end = time.time()
 
@@ -188,14 +302,15 @@ def run():
     print("1. Human vs Human")
     print("2. AI vs Human")
     print("3. AI vs AI")
+    print("4. Decision Tree AI vs Human")
 
     while True:
-        user_input = input("Enter the game mode number (1-3): ")
+        user_input = input("Enter the game mode number (1-4): ")
         if user_input.isdigit():
             game_mode = int(user_input)
-            if game_mode in [1, 2, 3]:
+            if game_mode in [1, 2, 3, 4]:
                 break
-        print("Invalid game mode. Please enter 1, 2 or 3.")
+        print("Invalid game mode. Please enter 1, 2, 3 or 4.")
 
     if game_mode == 1:
         human_vs_human()
@@ -203,4 +318,6 @@ def run():
         ai_vs_human()
     elif game_mode == 3:
         ai_vs_ai()
+    elif game_mode == 4:
+        ai_vs_human(model=load_tree_model())
 
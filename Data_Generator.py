@@ -1,21 +1,31 @@
 import Connect4 as C4
+import BinaryDataset
+import SolverLabels
 import numpy as np
 import csv
+import io
+import json
+import multiprocessing
 import os
+from MCTS import game_seed
 
-def run_simulation(simulation_limit):
+CSV_HEADER = [f"cell_{i+1}" for i in range(42)] + ["player_turn", "chosen_move"]
+
+def run_simulation(simulation_limit, workers=None, pool=None):
     """
     Executes a single simulation of a Connect Four match using two AI agents (MCTS).
+    With workers > 1, every move is searched with root-parallel MCTS on the given pool.
 
     Returns:
     - boardStates: A list of 1D arrays representing the state of the board at each move
     - playerTurns: A list indicating which player ("X" or "O") made each move
     - optimalMoves: A list of the moves chosen by the agents at each step
     """
-    boardStates, playerTurns, optimalMoves = C4.ai_vs_ai_simulation_generator(simulation_limit, simulation_limit)
+    boardStates, playerTurns, optimalMoves = C4.ai_vs_ai_simulation_generator(simulation_limit, simulation_limit, workers, pool)
     return boardStates, playerTurns, optimalMoves
 
-def generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iterations=150, append=True, simulation_limit=10000):
+def generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iterations=150, append=True, simulation_limit=10000,
+                    workers=None):
     """
     Generates a dataset by simulating multiple Connect Four games and logging the results
     into a CSV file inside a specific folder.
@@ -25,6 +35,8 @@ def generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iteratio
     - filename: Name of the CSV file
     - iterations: Number of games to simulate
     - append: Whether to append to the existing file or overwrite it
+    - simulation_limit: Number of MCTS simulations per move
+    - workers: Number of processes searching each move in parallel (None for a single process)
     """
     os.makedirs(folder, exist_ok=True)  # Create folder if it doesn't exist
     filepath = os.path.join(folder, filename)
@@ -32,17 +44,18 @@ def generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iteratio
     file_exists = os.path.isfile(filepath)
     mode = 'a' if append else 'w'
 
+    pool = multiprocessing.Pool(workers) if workers and workers > 1 else None
+
     with open(filepath, mode, newline='') as csvfile:
         writer = csv.writer(csvfile)
 
         # Write header if file is new or being overwritten
         if not file_exists or not append:
-            header = [f"cell_{i+1}" for i in range(42)] + ["player_turn", "chosen_move"]
-            writer.writerow(header)
+            writer.writerow(CSV_HEADER)
 
         for i in range(iterations):
             print(f"Initiating simulation {i + 1}:")
-            boardStates, playerTurns, optimalMoves = run_simulation(simulation_limit)
+            boardStates, playerTurns, optimalMoves = run_simulation(simulation_limit, workers, pool)
 
             for state, player, move in zip(boardStates, playerTurns, optimalMoves):
                 row = list(state) + [player, move]
@@ -52,5 +65,149 @@ def generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iteratio
             print(f"Progress: { round(((i + 1)/iterations) * 100, 2)}%")
             print("")
 
-# Generate and save in "datasets/connect4_dataset.csv"
-generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iterations=500, append=True, simulation_limit=5000)
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+def play_game(game_id, seed, simulation_limit):
+    """
+    Plays one seeded game in a worker process.
+
+    Returns:
+    - game_id: The id of the game that was played
+    - rows: The CSV rows (42 cells, player, 1-based move) of every position of the game
+    """
+    boardStates, playerTurns, optimalMoves = C4.ai_vs_ai_simulation_generator(simulation_limit, simulation_limit,
+                                                                              seed=seed)
+    rows = [list(state) + [player, move] for state, player, move in zip(boardStates, playerTurns, optimalMoves)]
+    return game_id, rows
+
+def play_game_job(job):
+    """
+    Unpacks a (game_id, seed, simulation_limit) job for Pool.imap_unordered.
+    """
+    return play_game(*job)
+
+def load_checkpoint(checkpoint_path):
+    """
+    Reads a checkpoint file, returning None if there is none.
+    """
+    if not os.path.isfile(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        return json.load(f)
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    """
+    Writes a checkpoint atomically, so a run killed mid-write keeps the previous one.
+    """
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+def encode_game(rows, binary):
+    """
+    Serializes the rows of one game in the CSV or in the binary dataset format.
+    """
+    if binary:
+        return BinaryDataset.encode_rows(rows).tobytes()
+    text = io.StringIO()
+    csv.writer(text).writerows(rows)
+    return text.getvalue().encode()
+
+def generate_db_parallel(folder="datasets", filename="connect4_dataset.csv", iterations=150,
+                         simulation_limit=10000, workers=None, base_seed=0):
+    """
+    Generates a dataset by playing games in a pool of worker processes, one game per task.
+    Games are streamed back to this process, the only writer, as soon as they finish, so a
+    long game does not hold back the ones after it. Games are therefore written in completion
+    order; the rows of a game stay together and each game depends only on its id and seed.
+    Files ending in BinaryDataset.BINARY_EXTENSION (".c4ds") are written in the binary
+    dataset format, any other file as CSV.
+
+    The run is resumable: after every game, the file is flushed and a checkpoint file
+    (<filename>.checkpoint.json) records the seed, the simulation limit, the finished game ids
+    and the file size. A killed run started again with the same arguments truncates the file to the last checkpoint and
+    only plays the missing games, so no game is written twice. Game i always uses the seed
+    game_seed(base_seed, i), which makes runs reproducible. Resuming with another base_seed
+    or simulation_limit raises a ValueError instead of mixing games of two runs.
+
+    Parameters:
+    - folder: Folder to store the dataset file
+    - filename: Name of the dataset file (positions are appended to it if it already exists)
+    - iterations: Number of games in the run
+    - simulation_limit: Number of MCTS simulations per move
+    - workers: Number of worker processes (default: number of CPUs)
+    - base_seed: Seed of the run, combined with the game id to seed each game
+    """
+    os.makedirs(folder, exist_ok=True)
+    filepath = os.path.join(folder, filename)
+    checkpoint_path = filepath + ".checkpoint.json"
+    binary = filename.endswith(BinaryDataset.BINARY_EXTENSION)
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        for name, value in (("base_seed", base_seed), ("simulation_limit", simulation_limit)):
+            if checkpoint.setdefault(name, value) != value:  # checkpoints of older runs have no simulation_limit
+                raise ValueError(f"{checkpoint_path} belongs to a run with {name}={checkpoint[name]}.")
+    if checkpoint is None:
+        if not os.path.isfile(filepath):
+            if binary:
+                BinaryDataset.DatasetWriter(filepath, append=False).close()
+            else:
+                with open(filepath, "w", newline="") as csvfile:
+                    csv.writer(csvfile).writerow(CSV_HEADER)
+        checkpoint = {"base_seed": base_seed, "simulation_limit": simulation_limit, "completed": [],
+                      "offset": os.path.getsize(filepath)}
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    completed = set(checkpoint["completed"])
+    jobs = [(i, game_seed(base_seed, i), simulation_limit) for i in range(iterations) if i not in completed]
+    print(f"{len(completed)} games already done, {len(jobs)} to play.")
+
+    with open(filepath, "r+b") as f:
+        f.truncate(checkpoint["offset"])  # drop positions of a game interrupted before its checkpoint
+        f.seek(checkpoint["offset"])
+
+        with multiprocessing.Pool(workers) as pool:
+            for done, (game_id, rows) in enumerate(pool.imap_unordered(play_game_job, jobs), start=1):
+                f.write(encode_game(rows, binary))
+                f.flush()
+                os.fsync(f.fileno())
+
+                completed.add(game_id)
+                checkpoint["completed"] = sorted(completed)
+                checkpoint["offset"] = f.tell()
+                save_checkpoint(checkpoint_path, checkpoint)
+                print(f"Game {game_id} completed ({len(rows)} positions). Progress: {round(done / len(jobs) * 100, 2)}%")
+
+def generate_labelled_db(folder="datasets", filename="connect4_dataset.csv", labelled_filename="connect4_labelled.csv",
+                         iterations=150, simulation_limit=1000, workers=None, base_seed=0, time_limit=None,
+                         cache_path=os.path.join("datasets", "solved_positions.sqlite")):
+    """
+    Generates positions by self-play (see generate_db_parallel), then labels every one
+    with the exact solver: game value, best-move set and per-column scores.
+    As the labels no longer come from the searches, a small simulation_limit is enough.
+
+    Parameters:
+    - folder, filename, iterations, simulation_limit, workers, base_seed: As in generate_db_parallel.
+    - labelled_filename: Name of the labelled CSV written next to the dataset (binary
+      datasets get their value field filled in place instead).
+    - time_limit: Seconds allowed to solve a position; positions not solved in time stay unlabelled.
+    - cache_path: Persistent cache of solved positions (SolverLabels.SolveCache).
+    """
+    generate_db_parallel(folder, filename, iterations, simulation_limit, workers, base_seed)
+    filepath = os.path.join(folder, filename)
+    if filename.endswith(BinaryDataset.BINARY_EXTENSION):
+        solved = SolverLabels.relabel_binary(filepath, cache_path=cache_path, time_limit=time_limit, workers=workers)
+    else:
+        solved = SolverLabels.relabel_csv(filepath, os.path.join(folder, labelled_filename), with_scores=True,
+                                          cache_path=cache_path, time_limit=time_limit, workers=workers)
+    print(f"{solved} positions labelled by the solver.")
+
+if __name__ == "__main__":
+    # Generate and save in "datasets/connect4_dataset.csv"
+    generate_db_csv(folder="datasets", filename="connect4_dataset.csv", iterations=500, append=True, simulation_limit=5000)
@@ -0,0 +1,191 @@
+import csv
+import os
+import sqlite3
+import sys
+import numpy as np
+from BinaryDataset import RECORD_DTYPE, DatasetWriter, encode_rows, load_dataset
+from BitBoard import COLUMN_BITS, WIDTH
+
+COLUMN = np.uint64((1 << COLUMN_BITS) - 1)
+
+
+def mirror_bits(bits):
+    """
+    Reflects an array of bitboards left to right (column c becomes column 6 - c).
+    """
+    bits = np.asarray(bits, dtype=np.uint64)
+    mirrored = np.zeros_like(bits)
+    for col in range(WIDTH):
+        column = (bits >> np.uint64(col * COLUMN_BITS)) & COLUMN
+        mirrored |= column << np.uint64((WIDTH - 1 - col) * COLUMN_BITS)
+    return mirrored
+
+
+def canonicalize(records):
+    """
+    Maps every position to the smaller of itself and its mirror image, mirroring the move with it.
+
+    Returns:
+    - A copy of the records in canonical orientation.
+    """
+    records = np.array(records, dtype=RECORD_DTYPE)
+    x_mirror, o_mirror = mirror_bits(records["x_bits"]), mirror_bits(records["o_bits"])
+    flip = (x_mirror < records["x_bits"]) | ((x_mirror == records["x_bits"]) & (o_mirror < records["o_bits"]))
+    records["x_bits"][flip] = x_mirror[flip]
+    records["o_bits"][flip] = o_mirror[flip]
+    records["move"][flip] = WIDTH - 1 - records["move"][flip]
+    return records
+
+
+def dedup_records(records):
+    """
+    Merges duplicate positions (after canonicalization) in memory.
+
+    Parameters:
+    - records: Array of RECORD_DTYPE.
+
+    Returns:
+    - unique: One record per canonical position, sorted by position, labelled with its most frequent move.
+    - move_counts: (m, 7) uint32 array with how often each column was chosen in that position.
+    """
+    records = canonicalize(records)
+    keys = np.stack([records["x_bits"], records["o_bits"]], axis=1)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    move_counts = np.zeros((len(first), WIDTH), dtype=np.uint32)
+    np.add.at(move_counts, (inverse, records["move"]), 1)
+    values = np.full(len(first), np.iinfo(np.int8).min, dtype=np.int8)
+    np.maximum.at(values, inverse, records["value"])  # keeps a known value over NO_VALUE
+
+    unique = records[first]
+    unique["move"] = move_counts.argmax(axis=1)
+    unique["value"] = values
+    return unique, move_counts
+
+
+class PositionIndex:
+    def __init__(self, path):
+        """
+        On-disk index of canonical positions and their move counts (SQLite),
+        used to deduplicate datasets that do not fit in memory.
+
+        Parameters:
+        - path: Path of the SQLite file (created if missing, extended if it exists).
+        """
+        self.connection = sqlite3.connect(path)
+        columns = ", ".join(f"c{col} INTEGER" for col in range(WIDTH))
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS positions (x INTEGER, o INTEGER, player INTEGER, "
+                                f"value INTEGER, {columns}, PRIMARY KEY (x, o)) WITHOUT ROWID")
+        updates = ", ".join(f"c{col} = c{col} + excluded.c{col}" for col in range(WIDTH))
+        self.upsert = (f"INSERT INTO positions VALUES ({', '.join('?' * (WIDTH + 4))}) ON CONFLICT (x, o) "
+                       f"DO UPDATE SET value = max(value, excluded.value), {updates}")
+
+    def add(self, records):
+        """
+        Adds a chunk of records, merging it in memory first.
+        """
+        unique, move_counts = dedup_records(records)
+        rows = zip(unique["x_bits"].tolist(), unique["o_bits"].tolist(), unique["player"].tolist(),
+                   unique["value"].tolist(), *move_counts.T.tolist())
+        with self.connection:
+            self.connection.executemany(self.upsert, rows)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def export(self, chunk_size=100000):
+        """
+        Yields (records, move_counts) chunks of the indexed positions, sorted by position.
+        """
+        cursor = self.connection.execute("SELECT * FROM positions ORDER BY x, o")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            table = np.array(rows, dtype=np.int64)
+            records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+            records["x_bits"], records["o_bits"] = table[:, 0], table[:, 1]
+            records["player"], records["value"] = table[:, 2], table[:, 3]
+            move_counts = table[:, 4:].astype(np.uint32)
+            records["move"] = move_counts.argmax(axis=1)
+            yield records, move_counts
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_records(path, chunk_size=1000000):
+    """
+    Yields chunks of records from a binary dataset or a CSV dataset.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)  # header
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield encode_rows(chunk)
+                    chunk = []
+            if chunk:
+                yield encode_rows(chunk)
+    else:
+        records = load_dataset(path)
+        for start in range(0, len(records), chunk_size):
+            yield np.asarray(records[start:start + chunk_size])
+
+
+def dedup_dataset(source, target, index_path=None, chunk_size=1000000):
+    """
+    Writes the deduplicated, mirror-canonical version of a dataset.
+    Each position appears once, labelled with its most frequent move; the move counts
+    are saved next to it as a (n, 7) array in <target>.counts.npy.
+
+    Parameters:
+    - source: CSV or binary dataset to deduplicate.
+    - target: Binary dataset file to write.
+    - index_path: SQLite file used as on-disk index; None to deduplicate in memory.
+    - chunk_size: Number of positions read at a time.
+
+    Returns:
+    - The number of unique positions.
+    """
+    counts_path = target + ".counts.npy"
+    if index_path is None:
+        chunks = list(iter_records(source, chunk_size))
+        records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=RECORD_DTYPE)
+        unique, move_counts = dedup_records(records)
+        with DatasetWriter(target, append=False) as writer:
+            writer.write_records(unique)
+        np.save(counts_path, move_counts)
+        return len(unique)
+
+    with PositionIndex(index_path) as index:
+        for records in iter_records(source, chunk_size):
+            index.add(records)
+        total = len(index)
+        all_counts = np.lib.format.open_memmap(counts_path, mode="w+", dtype=np.uint32, shape=(total, WIDTH))
+        written = 0
+        with DatasetWriter(target, append=False) as writer:
+            for records, move_counts in index.export():
+                writer.write_records(records)
+                all_counts[written:written + len(records)] = move_counts
+                written += len(records)
+        all_counts.flush()
+    return total
+
+
+if __name__ == "__main__":
+    # python DatasetDedup.py dataset.csv|dataset.c4ds deduplicated.c4ds [index.sqlite]
+    source, target = sys.argv[1], sys.argv[2]
+    index_path = sys.argv[3] if len(sys.argv) > 3 else None
+    if index_path is not None and os.path.exists(index_path):
+        os.remove(index_path)
+    print(f"{dedup_dataset(source, target, index_path)} unique positions written to {target}")
@@ -1,56 +1,176 @@
 from collections import Counter
+import time
 import numpy as np
+from CompiledTree import CompiledTree
 from NodeDT import NodeDT
 
 class DecisionTree:
-    def __init__(self, min_sample_split=2, max_depth=15, n_features=None) -> None:
+    def __init__(self, min_sample_split=2, max_depth=15, n_features=None, seed=None) -> None:
         """
         Initializes the Decision Tree classifier.
 
         Parameters:
         - min_sample_split: Minimum number of samples required to split an internal node.
         - max_depth: Maximum depth allowed for the tree.
-        - n_features: Number of features to consider when looking for the best split.
+        - n_features: Number of features to consider when looking for the best split
+          (a new random subset is drawn at every node; None for all the features).
+        - seed: Seed of the random feature subsets.
         """
         self.min_sample_split = min_sample_split
         self.max_depth = max_depth
         self.n_features = n_features
+        self.rng = np.random.default_rng(seed)
         self.root = None
+        self.compiled = None
+        self.metadata = {}
 
-    def fit(self, X, y):
+    def fit(self, X, y, iterative=True):
         """
-        Fits the Decision Tree to the training data by building the tree recursively.
+        Fits the Decision Tree to the training data.
+
+        X is integer-encoded once into a single NumPy matrix (one small integer per cell)
+        and every node only refers to a contiguous range of a shared permutation of the
+        sample indices, which is partitioned in place when the node is split. No sub-frame
+        is copied, so the memory used stays close to the size of the encoded dataset.
+
+        Parameters:
+        - X: Features (pandas DataFrame or 2D array of categorical values).
+        - y: Labels (pandas Series or 1D array of non-negative integers).
+        - iterative: Build the tree with an explicit stack (True) or recursively (False).
         """
-        self.n_features = X.shape[1]
-        self.root = self.grow_tree(X, y)
+        codes, feature_values = self.encode(X)
+        classes, y_codes = np.unique(np.asarray(y), return_inverse=True)
+        self.fit_encoded(codes, y_codes.reshape(-1), classes.tolist(), feature_values, iterative=iterative)
 
-    def grow_tree(self, X, y, depth=0):
+    def fit_encoded(self, codes, y_codes, classes, feature_values, samples=None, iterative=True):
         """
-        Recursively builds the decision tree.
+        Fits the tree on data that is already integer-encoded (see encode), without copying it.
+
+        Parameters:
+        - codes: (n_samples, n_features) matrix of value codes.
+        - y_codes: Label of each sample, as an index into classes.
+        - classes: List of the labels.
+        - feature_values: For each feature, the list of values the codes refer to.
+        - samples: Indices of the samples to train on, repetitions allowed (e.g. a bootstrap sample); default all.
+        - iterative: Build the tree with an explicit stack (True) or recursively (False).
         """
-        n_samples, n_feats = X.shape
-        n_labels = len(np.unique(y))
+        n_total = codes.shape[1]
+        self.n_features = n_total if self.n_features is None else min(self.n_features, n_total)
+        self.codes, self.y_codes = codes, y_codes
+        self.classes, self.feature_values = classes, feature_values
+        self.offsets = np.concatenate([[0], np.cumsum([len(values) for values in feature_values])])
+        self.samples = np.arange(len(y_codes)) if samples is None else np.array(samples)
+        self.compiled = None
+        self.metadata = {"n_samples": len(self.samples), "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        try:
+            if iterative:
+                self.root = self.build_tree()
+            else:
+                self.root = self.grow_tree(0, len(self.samples))
+        finally:
+            del self.codes, self.y_codes, self.samples
 
-        # Stopping conditions
-        if (depth >= self.max_depth or n_labels == 1 or n_samples < self.min_sample_split):
-            leaf_value = self.most_common_label(y)
-            return NodeDT(value=leaf_value)
+    @staticmethod
+    def encode(X):
+        """
+        Integer-encodes every column of X.
 
-        best_feature, best_value = self.best_split(X, y, list(range(n_feats)))
+        Returns:
+        - codes: (n_samples, n_features) matrix where cell (i, j) is the index of X[i, j] in values[j].
+        - values: List with the sorted distinct values of every column.
+        """
+        X = np.asarray(X)
+        values = []
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for feat_idx in range(X.shape[1]):
+            column_values, column_codes = np.unique(X[:, feat_idx], return_inverse=True)
+            values.append(column_values.tolist())
+            if len(column_values) > np.iinfo(codes.dtype).max + 1:
+                codes = codes.astype(np.int32)
+            codes[:, feat_idx] = column_codes.reshape(-1)
+        return codes, values
 
-        node = NodeDT(feature=best_feature)
+    def stop(self, start, end, depth) -> bool:
+        """
+        Returns True if the node holding samples[start:end] must be a leaf.
+        """
+        if depth >= self.max_depth or end - start < self.min_sample_split:
+            return True
+        labels = self.y_codes[self.samples[start:end]]
+        return bool((labels == labels[0]).all())
+
+    def leaf_value(self, start, end):
+        """
+        Returns the most common label of samples[start:end]; ties go to the label seen first.
+        """
+        labels = self.y_codes[self.samples[start:end]]
+        counts = np.bincount(labels, minlength=len(self.classes))
+        tied = counts == counts.max()
+        return self.classes[labels[np.argmax(tied[labels])]]
+
+    def partition(self, start, end, feature):
+        """
+        Reorders samples[start:end] by their value of the given feature (stable, in place).
+
+        Returns:
+        - A list of (value, child_start, child_end) for every value present in the node.
+        """
+        idxs = self.samples[start:end]
+        column = self.codes[idxs, feature]
+        self.samples[start:end] = idxs[np.argsort(column, kind="stable")]
+        counts = np.bincount(column, minlength=len(self.feature_values[feature]))
+        bounds = start + np.concatenate([[0], np.cumsum(counts)])
+        return [(self.feature_values[feature][code], int(bounds[code]), int(bounds[code + 1]))
+                for code in np.flatnonzero(counts)]
 
-        for value in np.unique(X.iloc[:, best_feature]):
-            idxs = self.split(X.iloc[:, best_feature], value)
-            if len(idxs) > 0:
-                node.children[value] = self.grow_tree(
-                    X.iloc[idxs, :],
-                    y.iloc[idxs],
-                    depth + 1
-                )
+    def node_split(self, start, end):
+        """
+        Returns the best feature to split samples[start:end] on, among n_features
+        features drawn at random (all the features when n_features is the total).
+        """
+        n_total = self.codes.shape[1]
+        if self.n_features < n_total:
+            feat_idxs = np.sort(self.rng.choice(n_total, self.n_features, replace=False)).tolist()
+        else:
+            feat_idxs = list(range(n_total))
+        gains = self.split_gains(self.codes, self.offsets, self.y_codes, len(self.classes),
+                                 self.samples[start:end], feat_idxs)
+        best = int(np.argmax(gains))  # first best split, in feature then value order
+        local_offsets = np.cumsum([self.offsets[f + 1] - self.offsets[f] for f in feat_idxs])
+        return feat_idxs[int(np.searchsorted(local_offsets, best, side="right"))]
+
+    def grow_tree(self, start, end, depth=0):
+        """
+        Recursively builds the decision tree for the samples in samples[start:end].
+        """
+        # Stopping conditions
+        if self.stop(start, end, depth):
+            return NodeDT(value=self.leaf_value(start, end))
 
+        best_feature = self.node_split(start, end)
+        node = NodeDT(feature=best_feature)
+        for value, child_start, child_end in self.partition(start, end, best_feature):
+            node.children[value] = self.grow_tree(child_start, child_end, depth + 1)
         return node
 
+    def build_tree(self):
+        """
+        Builds the decision tree with an explicit stack instead of recursion,
+        so deep trees do not hit the Python recursion limit.
+        """
+        tree = {}
+        stack = [(tree, "root", 0, len(self.samples), 0)]  # (parent children, branch value, start, end, depth)
+        while stack:
+            children, value, start, end, depth = stack.pop()
+            if self.stop(start, end, depth):
+                node = NodeDT(value=self.leaf_value(start, end))
+            else:
+                node = NodeDT(feature=self.node_split(start, end))
+                for child_value, child_start, child_end in reversed(self.partition(start, end, node.feature)):
+                    stack.append((node.children, child_value, child_start, child_end, depth + 1))
+            children[value] = node
+        return tree["root"]
+
     def most_common_label(self, y):
         """
         Returns the most common label in the target array y.
@@ -67,23 +187,67 @@ class DecisionTree:
         """
         if feat_idxs is None:
             feat_idxs = range(X.shape[1])
+        feat_idxs = list(feat_idxs)
+
+        codes, values = self.encode(X)
+        classes, y_codes = np.unique(np.asarray(y), return_inverse=True)
+        offsets = np.concatenate([[0], np.cumsum([len(column_values) for column_values in values])])
+        gains = self.split_gains(codes, offsets, y_codes.reshape(-1), len(classes), np.arange(len(codes)),
+                                 feat_idxs)
+
+        best = int(np.argmax(gains))  # first best split, in feature then value order
+        local_offsets = np.concatenate([[0], np.cumsum([len(values[f]) for f in feat_idxs])])
+        i = int(np.searchsorted(local_offsets, best, side="right")) - 1
+        return feat_idxs[i], values[feat_idxs[i]][best - local_offsets[i]]
 
-        best_gain = -1
-        best_split_feat, best_split_value = None, None
+    def split_gains(self, codes, offsets, y_codes, n_classes, idxs, feat_idxs):
+        """
+        Computes the information gain of every "feature == value" split of the samples idxs.
+
+        A single (feature value x class) contingency table is counted with np.bincount on the
+        integer-encoded columns, and the gain of every candidate split is derived from it at
+        once instead of masking the data once per value.
 
-        for feat_idx in feat_idxs:
-            X_column = X.iloc[:, feat_idx]
-            limits = np.unique(X_column)
+        Parameters:
+        - codes: Integer-encoded feature matrix (see encode).
+        - offsets: offsets[j] is the first value id of feature j, so value ids of all features share one range.
+        - y_codes: Integer-encoded labels.
+        - n_classes: Number of distinct labels.
+        - idxs: Indices of the samples in the node.
+        - feat_idxs: Candidate features.
 
-            for split_criteria in limits:
-                gain = self.information_gain(y, X_column, split_criteria)
+        Returns:
+        - The gains of the values of feat_idxs, feature after feature (0 for values absent from the node).
+        """
+        n = len(idxs)
+        labels = y_codes[idxs]
+        table = np.concatenate([
+            np.bincount(codes[idxs, f].astype(np.intp) * n_classes + labels,
+                        minlength=(offsets[f + 1] - offsets[f]) * n_classes).reshape(-1, n_classes)
+            for f in feat_idxs
+        ])
+        parent = np.bincount(labels, minlength=n_classes)
+        rest = parent - table
+        n_matching = table.sum(axis=1)
+        n_non_matching = n - n_matching
 
-                if gain > best_gain:
-                    best_gain = gain
-                    best_split_feat = feat_idx
-                    best_split_value = split_criteria
+        child_entropy = (self.weighted_entropy(table) + self.weighted_entropy(rest)) / n
+        gains = self.weighted_entropy(parent[None, :])[0] / n - child_entropy
+        gains[(n_matching == 0) | (n_non_matching == 0)] = 0
+        # Round off float noise so that equal gains tie and the first candidate wins
+        return np.maximum(np.round(gains, 12), 0)
 
-        return best_split_feat, best_split_value
+    @staticmethod
+    def weighted_entropy(counts):
+        """
+        Returns, for each row of class counts, the entropy of the row times its number of samples.
+        """
+        counts = counts.astype(np.float64)
+        totals = counts.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            plogp = np.where(counts > 0, counts * np.log2(counts), 0.0).sum(axis=1)
+            total_log = np.where(totals > 0, totals * np.log2(totals), 0.0)
+        return total_log - plogp
 
     def information_gain(self, y, X_column, split_criteria):
         """
@@ -128,7 +292,49 @@ class DecisionTree:
         """
         Predicts the class labels for the input data X.
         """
-        return list(self.traverse_tree(x, self.root) for x in X.values)
+        if self.root is None and self.compiled is not None:  # loaded from a model file
+            return list(self.compiled.predict_batch(X))
+        return list(self.traverse_tree(x, self.root) for x in np.asarray(X))
+
+    def compile(self) -> CompiledTree:
+        """
+        Flattens the trained tree into NumPy arrays (see CompiledTree) and keeps it for predict_batch.
+        """
+        self.compiled = CompiledTree.from_tree(self.root, self.classes, self.feature_values)
+        return self.compiled
+
+    def predict_batch(self, X):
+        """
+        Predicts the class labels for the input data X with the compiled tree,
+        evaluating all samples together level by level.
+        """
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.predict_batch(X)
+
+    def save(self, path):
+        """
+        Saves the trained tree to a model file (see CompiledTree.save), with its
+        hyperparameters and training metadata.
+        """
+        if self.compiled is None:
+            self.compile()
+        metadata = dict(self.metadata, min_sample_split=self.min_sample_split, max_depth=self.max_depth,
+                        n_features=self.n_features, n_nodes=len(self.compiled))
+        self.compiled.save(path, metadata)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a tree saved with save. The loaded tree predicts through its compiled
+        arrays, which are memory-mapped unless mmap is False.
+        """
+        compiled, metadata = CompiledTree.load(path, mmap)
+        tree = cls(metadata.get("min_sample_split", 2), metadata.get("max_depth", 15), metadata.get("n_features"))
+        tree.compiled = compiled
+        tree.classes, tree.feature_values = compiled.classes, compiled.feature_values
+        tree.metadata = metadata
+        return tree
 
     def traverse_tree(self, x, node):
         """
@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import Connect4
+from BitBoard import WIDTH, BitBoard
+from MCTS import MCTS, other_player
+from NodeMCTS import NodeMCTS
+from OpeningBook import canonical_key
+
+KINDS = ("hint", "move")
+LOGGER = logging.getLogger(__name__)
+
+
+def replay(moves, first_player="X"):
+    """
+    Plays a sequence of columns (0-based) from the empty board.
+
+    Returns:
+    - The board and the player to move.
+    """
+    if any(not 0 <= col < WIDTH for col in moves):
+        raise ValueError("Columns must be between 0 and 6.")
+    game = BitBoard()
+    player = first_player
+    for col in moves:
+        if not game.is_legal_move(col):
+            raise ValueError(f"Column {col} is full.")
+        game.make_move(col, player)
+        if game.is_won(col, player):
+            raise ValueError("The game is already over.")
+        player = other_player(player)
+    if game.is_board_full():
+        raise ValueError("The game is already over.")
+    return game, player
+
+
+def search_position(moves, first_player, kind, time_limit, seed):
+    """
+    Answers one request in a worker process. A "hint" is computed as in Connect4.get_hint
+    (opening book, exact solver near the end, otherwise MCTS with early stopping);
+    a "move" is the AI player's MCTS move (with the opening book).
+
+    Returns:
+    - The column (0-based) and the proven outcome for the player to move ("win", "draw", "loss" or None).
+    """
+    game, player = replay(moves, first_player)
+    if kind == "hint":
+        column, outcome = Connect4.get_hint(game, player, time_limit)
+        return column - 1, outcome
+    mcts = MCTS(NodeMCTS(game, None), player, simulation_limit=None, time_limit=time_limit, seed=seed,
+                book=Connect4.get_opening_book())
+    return mcts.best_move().move, None
+
+
+class HintService:
+    def __init__(self, workers=None, cache_size=10000, default_time_limit=1.0, max_time_limit=10.0):
+        """
+        Asyncio front end answering move and hint requests for many games at once.
+        Searches run in a process pool with a per-request time budget. Requests for a
+        position already being searched wait for that search instead of starting another,
+        and recent answers are kept in an LRU cache. Positions are keyed independently
+        of colours and mirroring, as in the opening book. A cached or running search only
+        answers requests whose budget is not larger than its own (proven outcomes answer all).
+
+        Parameters:
+        - workers: Number of search processes (default: number of CPUs).
+        - cache_size: Number of answers kept in the cache.
+        - default_time_limit: Search budget of requests that do not give one, in seconds.
+        - max_time_limit: Largest budget a request may ask for.
+        """
+        self.workers = workers
+        self.cache_size = cache_size
+        self.default_time_limit = default_time_limit
+        self.max_time_limit = max_time_limit
+        self.cache = OrderedDict()  # (kind, canonical key) -> (canonical column, outcome, budget)
+        self.in_flight = {}  # (kind, canonical key) -> (task of the running search, budget)
+        self.executor = None
+        self.rng = random.Random()
+        self.stats = {"requests": 0, "cache_hits": 0, "merged": 0, "searches": 0}
+
+    async def start(self):
+        """
+        Starts the worker pool.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+
+    async def close(self):
+        """
+        Stops the worker pool once the running searches are done.
+        """
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def request(self, moves, kind="hint", time_limit=None, first_player="X"):
+        """
+        Answers a request for the position reached by playing moves (0-based columns) from the empty board.
+
+        Parameters:
+        - moves: The columns played so far.
+        - kind: "hint" or "move" (see search_position).
+        - time_limit: Search budget in seconds (default: default_time_limit, at most max_time_limit).
+        - first_player: The player who made the first move.
+
+        Returns:
+        - A dict with the column ("move", 1-based), the proven "outcome" (or None) and
+          the "source" of the answer ("cache", "merged" or "search").
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}.")
+        game, player = replay(moves, first_player)
+        key, mirrored = canonical_key(game, player)
+        key = (kind, key)
+        budget = min(time_limit or self.default_time_limit, self.max_time_limit)
+        self.stats["requests"] += 1
+
+        cached = self.cache.get(key)
+        running = self.in_flight.get(key)
+        if cached is not None and (cached[1] is not None or cached[2] >= budget):
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            column, outcome, _ = cached
+            source = "cache"
+        elif running is not None and running[1] >= budget:
+            self.stats["merged"] += 1
+            column, outcome = await asyncio.shield(running[0])
+            source = "merged"
+        else:
+            task = asyncio.create_task(self.search(key, moves, first_player, kind, budget, mirrored))
+            self.in_flight[key] = (task, budget)
+            column, outcome = await asyncio.shield(task)  # a cancelled request leaves the search to the others
+            source = "search"
+
+        column = WIDTH - 1 - column if mirrored else column
+        return {"move": column + 1, "outcome": outcome, "source": source}
+
+    async def search(self, key, moves, first_player, kind, budget, mirrored):
+        """
+        Runs the search of a request in the pool and caches its answer. Runs as a task
+        registered in in_flight, which requests for the same position wait for.
+
+        Returns:
+        - The column in canonical orientation and the outcome.
+        """
+        task = asyncio.current_task()
+        try:
+            await self.start()
+            self.stats["searches"] += 1
+            column, outcome = await asyncio.get_running_loop().run_in_executor(
+                self.executor, search_position, list(moves), first_player, kind, budget, self.rng.getrandbits(32))
+        finally:
+            if self.in_flight.get(key, (None,))[0] is task:  # a longer search may have replaced it
+                del self.in_flight[key]
+        column = WIDTH - 1 - column if mirrored else column
+        cached = self.cache.get(key)
+        if cached is None or cached[1] is None and cached[2] <= budget:  # keep the answer of the longest search
+            self.cache[key] = (column, outcome, budget)
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return column, outcome
+
+
+async def handle_connection(service, reader, writer):
+    """
+    Serves one client connection: one JSON request per line
+    ({"moves": [...], "kind": "hint", "time_limit": 0.5, "first_player": "X"}),
+    one JSON answer per line. Requests of a connection are answered concurrently,
+    each answer carrying the "id" of its request.
+    """
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def answer(message):
+        try:
+            response = await service.request(message["moves"], message.get("kind", "hint"),
+                                             message.get("time_limit"), message.get("first_player", "X"))
+        except (KeyError, TypeError, ValueError) as error:
+            response = {"error": str(error)}
+        except Exception as error:  # e.g. a broken worker pool: the client still gets an answer
+            LOGGER.exception("Request %r failed", message)
+            response = {"error": f"{type(error).__name__}: {error}"}
+        response["id"] = message.get("id")
+        async with lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    try:
+        while line := await reader.readline():
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                message = {}
+            task = asyncio.create_task(answer(message if isinstance(message, dict) else {}))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765):
+    """
+    Starts a TCP server answering the JSON-lines protocol of handle_connection.
+    """
+    await service.start()
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+
+
+class HintClient:
+    def __init__(self, host="127.0.0.1", port=8765):
+        """
+        Client of the hint server, multiplexing concurrent requests over one connection.
+        """
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+        self.pending = {}
+        self.next_id = 0
+        self.listener = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.listener = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        """
+        Resolves the pending requests as their answers arrive.
+        """
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self.pending.pop(response.pop("id"), None)
+            if future is not None:
+                future.set_result(response)
+        for future in self.pending.values():  # the server closed the connection
+            future.set_exception(ConnectionError("Connection closed by the server."))
+        self.pending.clear()
+
+    async def request(self, moves, kind="hint", time_limit=None, first_player="X"):
+        """
+        Sends a request and waits for its answer (same arguments and answer as HintService.request).
+        """
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        message = {"id": self.next_id, "moves": list(moves), "kind": kind, "time_limit": time_limit,
+                   "first_player": first_player}
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.cancel()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+def random_positions(count, seed=0, max_moves=20):
+    """
+    Returns move sequences of positions reached by random play, for load tests.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        try:
+            moves = [rng.choice([2, 3, 4]) if i < 4 else rng.randrange(WIDTH) for i in range(rng.randrange(max_moves))]
+            replay(moves)
+        except ValueError:
+            continue
+        positions.append(moves)
+    return positions
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of the sorted values fall.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def load_test(client, requests=200, concurrency=32, distinct=50, kind="hint", time_limit=0.2, seed=0):
+    """
+    Sends requests for positions drawn (with repetitions) from a pool of distinct
+    random positions, keeping at most concurrency requests open at once.
+
+    Parameters:
+    - client: A HintService or a connected HintClient.
+    - requests: Number of requests.
+    - concurrency: Number of concurrent requests.
+    - distinct: Number of distinct positions, so repeated positions exercise the cache and merging.
+    - kind, time_limit: As in HintService.request.
+    - seed: Seed of the positions and of their order.
+
+    Returns:
+    - A dict with the p50 and p99 latencies (seconds), requests per second and the count of each answer source.
+    """
+    positions = random_positions(distinct, seed)
+    rng = random.Random(seed)
+    queue = [rng.choice(positions) for _ in range(requests)]
+    latencies = []
+    sources = {}
+
+    async def user():
+        while queue:
+            moves = queue.pop()
+            start = time.perf_counter()
+            response = await client.request(moves, kind, time_limit)
+            latencies.append(time.perf_counter() - start)
+            sources[response.get("source", "error")] = sources.get(response.get("source", "error"), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"requests": requests, "p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99),
+            "requests_per_s": requests / elapsed, "sources": sources}
+
+
+async def main(args):
+    service = HintService(args.workers, default_time_limit=args.time_limit)
+    async with service:
+        server = await serve(service, args.host, args.port)
+        async with server:
+            if args.command == "serve":
+                print(f"Serving on {args.host}:{args.port}")
+                await server.serve_forever()
+            else:
+                async with HintClient(args.host, args.port) as client:
+                    report = await load_test(client, args.requests, args.concurrency, args.distinct, args.kind,
+                                             args.time_limit)
+                print(f"{report['requests']} requests: p50 {report['p50'] * 1000:.1f} ms, "
+                      f"p99 {report['p99'] * 1000:.1f} ms, {report['requests_per_s']:.1f} requests/s, "
+                      f"answers {report['sources']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect Four hint / move service.")
+    parser.add_argument("command", choices=["serve", "loadtest"],
+                        help="run the server, or run it and load-test it with a local client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--time-limit", type=float, default=0.2, help="search budget per request (seconds)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=50, help="distinct positions in the load test")
+    parser.add_argument("--kind", choices=KINDS, default="hint")
+    asyncio.run(main(parser.parse_args()))
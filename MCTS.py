@@ -1,109 +1,474 @@
 import random
+import time
 from copy import deepcopy
+import numpy as np
+from BatchRollout import rollout_counts
+from BitBoard import BitBoard
 from NodeMCTS import NodeMCTS
+from SearchStats import SearchInstruments
+from Solver import Solver
+
+
+def other_player(player):
+    """
+    Returns the opponent of the given player.
+    """
+    return "O" if player == "X" else "X"
+
+
+def game_seed(base_seed, game_id):
+    """
+    Returns the seed of one game, so that every game of a run can be replayed on its own.
+    """
+    return base_seed * 1000003 + game_id
+
+
+def playout(board, player, rng):
+    """
+    Plays random moves on the board, starting with the given player, until
+    the game ends, then undoes them all.
+
+    Returns:
+    - The winner ("X" or "O"), or "." for a tie.
+    """
+    result = "."
+    played = 0
+
+    while not board.is_board_full():
+        move = rng.choice(board.get_legal_moves())
+        board.make_move(move, player)
+        played += 1
+
+        if board.is_won(move, player):
+            result = player
+            break
+
+        player = other_player(player)
+
+    for _ in range(played):
+        board.undo_move()
+    return result
+
+
+def make_child(node, board, move):
+    """
+    Plays the move on the board (which must be at the node's position) and
+    returns the resulting child node, marked as terminal if the game is over.
+    The child is not attached to the node.
+    """
+    player = other_player(node.player)
+    board.make_move(move, player)
+
+    child = NodeMCTS(parent=node, move=move, player=player)
+    if board.is_won(move, player):
+        child.winner = player
+    elif board.is_board_full():
+        child.winner = "."
+        child.untried_moves = 0
+    return child
+
+
+CHECK_INTERVAL = 32  # iterations between two clock / early-stop checks
+SOLVER_SHARE = 0.5  # share of the remaining time budget the root solver may use before the search takes over
+
 
 class MCTS:
-    def __init__(self, initial_state, current_player, simulation_limit=10000):
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None, early_stop=False,
+                 seed=None, rollout_batch=None, solver_threshold=None, rollout=None, book=None, instrument=False,
+                 on_stats=None, stats_interval=1.0, c=1.4):
         """
         Initializes the MCTS agent.
 
         Parameters:
         - initial_state: The root node containing the current game state.
         - current_player: The player for whom the move is being calculated.
-        - simulation_limit: Maximum number of simulations to run (default: 10000).
+        - simulation_limit: Maximum number of simulations to run (default: 10000, None for no limit).
+        - time_limit: Wall-clock budget per move in seconds (None for no limit).
+        - early_stop: Stop as soon as the most visited move can no longer be overtaken.
+        - seed: Seed of the agent's random number generator (None for a random seed).
+        - rollout_batch: If set, every leaf is evaluated with this many random playouts run
+          at once with NumPy (requires a BitBoard); each playout counts as one simulation.
+        - solver_threshold: If set, positions with at most this many empty cells are
+          solved exactly with the alpha-beta Solver instead of being sampled.
+        - rollout: Playout function with the signature of playout (default: uniformly random moves),
+          e.g. Policy.heuristic_playout.
+        - book: OpeningBook whose moves are played without searching when the position is in it.
+        - instrument: Record a SearchStats for every move in self.search_stats (phase times,
+          simulations per second, tree size and depth, rollout lengths, allocations, root
+          visits). Without it the search runs its plain methods, at no cost.
+        - on_stats: Function called with a SearchStats snapshot every stats_interval seconds
+          of search (implies instrument).
+        - stats_interval: Seconds between two on_stats calls.
+        - c: Exploration constant of the UCT formula.
         """
-        self.root = initial_state
+        if simulation_limit is None and time_limit is None:
+            raise ValueError("MCTS needs a simulation_limit or a time_limit.")
         self.simulation_limit = simulation_limit
+        self.time_limit = time_limit
+        self.early_stop = early_stop
+        self.rng = random.Random(seed)
+        self.rollout_batch = rollout_batch
+        self.np_rng = np.random.default_rng(seed)
+        self.solver_threshold = solver_threshold
+        self.rollout = rollout or playout
+        self.c = c
+        self.book = book
+        self.instrument = instrument or on_stats is not None
+        self.on_stats = on_stats
+        self.stats_interval = stats_interval
+        self.search_stats = None  # SearchStats of the last move, when instrumented
+        self.solver = None
+        self.solved_score = None  # exact score of the last move when it is proven (solver or immediate win)
         self.current_player = current_player
+        self.iterations = 0
+        self.stopped = False
+        self.set_root(initial_state)
+
+    def set_root(self, node):
+        """
+        Makes the given node the root of the search and prepares the search board.
+        """
+        node.parent = None
+        node.player = other_player(self.current_player)
+        self.root = node
+        self.board = deepcopy(node.board)  # single search board, moves are made and undone in place
+        self.root_counter = self.board.counter
+        self.root_history = list(self.board.history)
+        if self.rollout_batch and not isinstance(self.board, BitBoard):
+            raise ValueError("rollout_batch requires a BitBoard.")
+
+    def update_root(self, board):
+        """
+        Moves the root to the node matching the given board, keeping the subtree
+        (and its statistics) that was already searched below it.
+        Starts a fresh tree when the position cannot be reached from the current root.
+        """
+        played = self.root_history
+        node = self.root
+        if len(played) == self.root_counter and board.history[:len(played)] == played:
+            for move in board.history[len(played):]:
+                node = node.get_child(move)
+                if node is None:
+                    break
+        else:
+            node = None
+
+        if node is None:
+            node = NodeMCTS(board, None)
+        else:
+            node.board = board
+        self.set_root(node)
 
     def selection(self):
         """
         Selects the most promising node by traversing the tree
-        using the UCT value until a leaf is reached.
+        using the UCT value until a node that is not fully expanded is reached.
+        The moves along the path are played on the search board.
         """
         node = self.root
-        while node.children:
-            node = node.best_child()
+        while node.is_fully_expanded() and node.has_children() and not node.is_terminal():
+            node = node.best_child(self.c)
+            self.board.make_move(node.move, node.player)
         return node
 
     def expansion(self, node):
         """
-        Expands the given node by generating all possible child states.
+        Expands the given node by adding one child for a move that was not tried yet.
+        Returns the new child, or the node itself if it is terminal or has nothing left to expand.
         """
-        current_player = self.current_player
-        for board in node.board.get_possible_moves(current_player):
-            new_node = NodeMCTS(board, parent=node)
-            node.add_child(new_node)
+        if node.is_terminal():
+            return node
+        if node.untried_moves is None:
+            node.set_untried_moves(self.board.get_legal_moves())
+        if not node.untried_moves:
+            return node
+
+        move = node.pop_untried_move(self.rng)
+        child = make_child(node, self.board, move)
+        node.add_child(child)
+        return child
 
     def simulation(self, node):
         """
-        Simulates a random playout from the current node until
-        the game ends with a win or a tie.
+        Simulates a playout (random unless another rollout policy was given)
+        from the current node until the game ends with a win or a tie.
+        The playout is made and unmade in place on the search board.
         """
-        sim_board = deepcopy(node.board)
-        player = "O" if self.current_player == "X" else "X"
-
-        while not sim_board.is_board_full():
-            legal_moves = [i for i in range(sim_board.board_width) if sim_board.is_legal_move(i)]
-            move = random.choice(legal_moves)
-            sim_board.make_move(move, player)
-
-            if sim_board.is_won(move, player):
-                return player
-
-            player = "O" if player == "X" else "X"
-
-        return "."
+        if node.is_terminal():
+            return node.winner
+        return self.rollout(self.board, other_player(node.player), self.rng)
 
     def backpropagation(self, node, result):
         """
         Updates the statistics of the nodes on the path from the
         simulation result back to the root.
+        Each node counts wins for the player who made the move leading to it.
         """
         while node is not None:
             node.visits += 1
-            if result == self.current_player:
+            if result == node.player:
                 node.wins += 1
             elif result == ".":
                 node.wins += 0.5
             node = node.parent
 
+    def backpropagate_counts(self, node, counts):
+        """
+        Updates the statistics of the nodes on the path back to the root
+        with the results of a batch of playouts ({"X": wins, "O": wins, ".": ties}).
+        """
+        total = sum(counts.values())
+        while node is not None:
+            node.visits += total
+            node.wins += counts.get(node.player, 0) + 0.5 * counts["."]
+            node = node.parent
+
+    def reset_board(self):
+        """
+        Undoes the moves played during the last iteration so the search board is back at the root.
+        """
+        while self.board.counter > self.root_counter:
+            self.board.undo_move()
+
+    def winning_move(self):
+        """
+        Returns a column that wins immediately for the current player, or None.
+        """
+        board = self.board
+        for i in board.get_legal_moves():
+            board.make_move(i, self.current_player)
+            won = board.is_won(i, self.current_player)
+            board.undo_move()
+            if won:
+                return i
+        return None
+
     def check_for_win(self, leaf) -> NodeMCTS:
         """
         Checks if there is an immediate winning move for the current player.
-        If found, returns a new node representing that winning move.
+        If found, returns the node representing that winning move.
         """
-        possible_moves = [i for i in range(leaf.board.board_width) if leaf.board.is_legal_move(i)]
+        if leaf.untried_moves is None:
+            leaf.set_untried_moves(self.board.get_legal_moves())
 
-        for i in possible_moves:
-            simulated_board = deepcopy(leaf.board)
-            simulated_board.make_move(i, self.current_player)
-            if simulated_board.is_won(i, self.current_player):
-                return NodeMCTS(simulated_board, parent=leaf)
+        move = self.winning_move()
+        if move is None:
+            return None
 
-        return None
+        winning_node = leaf.get_child(move)
+        if winning_node is None:
+            winning_node = NodeMCTS(parent=leaf, move=move, player=self.current_player)
+            winning_node.winner = self.current_player
+            leaf.add_child(winning_node)
+            leaf.remove_untried_move(move)
+        return winning_node
 
-    def best_move(self):
+    def run_iteration(self):
         """
-        Runs the full MCTS process and returns the best child of the root node.
+        Runs one select/expand/simulate/backpropagate cycle.
+
+        Returns:
+        - The number of simulations played (rollout_batch when leaves are evaluated in batches).
         """
         leaf = self.selection()
-        if not leaf.children:
-            self.expansion(leaf)
+        node = self.expansion(leaf)
+        played = 1
+        if self.rollout_batch and not node.is_terminal():
+            counts = rollout_counts(self.board, other_player(node.player), self.rollout_batch, self.np_rng)
+            self.backpropagate_counts(node, counts)
+            played = self.rollout_batch
+        else:
+            result = self.simulation(node)
+            self.backpropagation(node, result)
+        self.reset_board()
+        return played
+
+    def root_children(self):
+        """
+        Returns the nodes of the moves searched from the root.
+        """
+        return self.root.child_nodes()
+
+    def tree_shape(self):
+        """
+        Returns the number of nodes of the search tree and the depth of its deepest node.
+        """
+        size, depth = 0, 0
+        stack = [(self.root, 0)]
+        while stack:
+            node, node_depth = stack.pop()
+            size += 1
+            depth = max(depth, node_depth)
+            stack.extend((child, node_depth + 1) for child in node.child_nodes())
+        return size, depth
+
+    def current_best(self):
+        """
+        Returns the best move found so far (the most visited root child).
+        Can be called at any point, e.g. from another thread while the search is running.
+        """
+        children = self.root_children()
+        if not children:
+            return None
+        return max(children, key=lambda child: child.visits)
+
+    def stop(self):
+        """
+        Asks a running search to return at its next check.
+        """
+        self.stopped = True
+
+    def is_decided(self, remaining) -> bool:
+        """
+        Returns True if the most visited root child cannot be overtaken
+        by the runner-up within the given number of remaining iterations.
+        """
+        children = self.root_children()
+        if len(children) < 2:
+            return True
+        first, second = sorted((child.visits for child in children), reverse=True)[:2]
+        return first - second > remaining
+
+    def remaining_iterations(self, start, deadline):
+        """
+        Estimates how many iterations are still allowed by the simulation and time budgets.
+        """
+        remaining = float("inf")
+        if self.simulation_limit is not None:
+            remaining = self.simulation_limit - self.iterations
+        if deadline is not None:
+            now = time.perf_counter()
+            rate = self.iterations / max(now - start, 1e-9)
+            remaining = min(remaining, rate * (deadline - now))
+        return remaining
+
+    def solve_root(self, deadline=None):
+        """
+        Solves the root position exactly when it has at most solver_threshold empty cells.
+        With a deadline, the solver only gets SOLVER_SHARE of the time left, so that the
+        search still has time to run if the position is not solved.
+        Returns the node of the best move, or None if the solver is disabled or ran out of time.
+        """
+        empty_cells = self.board.board_width * self.board.board_height - self.board.counter
+        if self.solver_threshold is None or empty_cells > self.solver_threshold:
+            return None
+        if self.solver is None:
+            self.solver = Solver()
+
+        time_limit = None
+        if deadline is not None:
+            time_limit = max(deadline - time.perf_counter(), 0) * SOLVER_SHARE
+        move, score = self.solver.best_move(self.board, self.current_player, time_limit=time_limit)
+        if move is None:
+            return None
+        self.solved_score = score
+        node = self.root.get_child(move)
+        if node is None:
+            node = NodeMCTS(parent=self.root, move=move, player=self.current_player)
+        return node
+
+    def book_move(self):
+        """
+        Returns the node of the opening book move for the root position, or None if it is not in the book.
+        """
+        if self.book is None:
+            return None
+        entry = self.book.lookup(self.board, self.current_player)
+        if entry is None:
+            return None
+        move, _ = entry
+        node = self.root.get_child(move)
+        if node is None:
+            node = NodeMCTS(parent=self.root, move=move, player=self.current_player)
+        return node
+
+    def best_move(self):
+        """
+        Runs the full MCTS process and returns the most visited child of the root node.
+        The search ends when the simulation limit or the time limit is reached,
+        when stop() is called or, with early_stop, once the best move is settled.
+        With instrument, the statistics of the search are left in self.search_stats.
+        """
+        if not self.instrument:
+            return self.search()[0]
+
+        instruments = SearchInstruments(self, self.on_stats, self.stats_interval)
+        instruments.attach()
+        try:
+            node, source = self.search(instruments)
+        finally:
+            instruments.detach()
+        self.search_stats = instruments.finish(node, source)
+        return node
 
-        winning_node = self.check_for_win(leaf)
+    def best_move_with_stats(self):
+        """
+        Runs an instrumented search.
+
+        Returns:
+        - The node of the chosen move and the SearchStats of the search.
+        """
+        instrument = self.instrument
+        self.instrument = True
+        try:
+            node = self.best_move()
+        finally:
+            self.instrument = instrument
+        return node, self.search_stats
+
+    def search(self, instruments=None):
+        """
+        Chooses the move: an immediate win, the book move, the solver's move, or else
+        the most visited root child after searching.
+
+        Returns:
+        - The node of the move and how it was chosen ("win", "book", "solver" or "search").
+        """
+        self.iterations = 0
+        self.stopped = False
+        self.solved_score = None
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+
+        winning_node = self.check_for_win(self.root)
         if winning_node:
-            return winning_node
+            cells = self.board.board_width * self.board.board_height
+            self.solved_score = (cells + 1 - self.board.counter) // 2
+            return winning_node, "win"
+
+        book_node = self.book_move()
+        if book_node:
+            return book_node, "book"
 
-        for child in leaf.children:
-            result = self.simulation(child)
-            self.backpropagation(child, result)
+        solved_node = self.solve_root(deadline)
+        if solved_node:
+            return solved_node, "solver"
+
+        return self.run_search(deadline, instruments), "search"
+
+    def run_search(self, deadline, instruments=None):
+        """
+        Runs search iterations until the simulation limit or the deadline is reached,
+        stop() is called or, with early_stop, the best move is settled.
+        Subclasses with another search loop override this method.
+
+        Returns:
+        - The most visited root child.
+        """
+        start = time.perf_counter()
+        limit = self.simulation_limit
+        loops = 0
 
-        children = leaf.children
+        while limit is None or self.iterations < limit:
+            played = self.run_iteration()
+            self.iterations += played
+            loops += 1
 
-        for _ in range(7, self.simulation_limit + 1):
-            selected_leaf = random.choice(children)
-            result = self.simulation(selected_leaf)
-            self.backpropagation(selected_leaf, result)
+            if loops % CHECK_INTERVAL == 0 or played > 1:
+                if self.stopped or (deadline is not None and time.perf_counter() >= deadline):
+                    break
+                if self.early_stop and self.is_decided(self.remaining_iterations(start, deadline)):
+                    break
+                if instruments is not None:
+                    instruments.tick()
 
-        return self.root.best_child()
+        return self.current_best()
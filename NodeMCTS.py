@@ -1,38 +1,130 @@
 import math
+from copy import deepcopy
 
 class NodeMCTS:
-    def __init__(self, board, parent=None):
+    __slots__ = ("board", "parent", "move", "player", "children", "untried_moves", "winner", "wins", "visits",
+                 "priors")
+
+    def __init__(self, board=None, parent=None, move=None, player=None):
         """
         Initializes a node representing a game state in the MCTS tree.
+        Nodes use __slots__ and only the root stores a board; the others store the
+        column that leads to them and rebuild their board from the root when needed.
 
         Parameters:
-        - board: The game board associated with this node.
+        - board: The game board associated with this node (only the root needs one).
         - parent: The parent node in the tree (None if this is the root).
+        - move: The column played to reach this node from its parent.
+        - player: The player who made that move; wins are counted from their perspective.
         """
         self.board = board
         self.parent = parent
-        self.children = []
+        self.move = move
+        self.player = player
+        self.children = None  # fixed 7-slot list indexed by column, allocated on the first child
+        self.untried_moves = None  # bitmask of the columns not expanded yet, set on the first expansion
+        self.winner = None  # "X", "O" or "." once the node is known to be terminal
         self.wins = 0
         self.visits = 0
+        self.priors = None  # prior probability of each column, set by searches that use one (PUCTMCTS)
+
+    def get_board(self):
+        """
+        Returns the board of this node, rebuilt from the closest ancestor that stores one.
+        """
+        moves = []
+        node = self
+        while node.board is None:
+            moves.append((node.move, node.player))
+            node = node.parent
+        board = deepcopy(node.board)
+        for move, player in reversed(moves):
+            board.make_move(move, player)
+        return board
+
+    def set_untried_moves(self, moves):
+        """
+        Records the legal moves of this state as not expanded yet.
+        """
+        self.untried_moves = sum(1 << move for move in moves)
+
+    def pop_untried_move(self, rng):
+        """
+        Removes and returns a random move that was not expanded yet.
+        """
+        moves = [move for move in range(7) if self.untried_moves >> move & 1]
+        move = rng.choice(moves)
+        self.untried_moves &= ~(1 << move)
+        return move
+
+    def remove_untried_move(self, move):
+        """
+        Marks the given move as expanded.
+        """
+        self.untried_moves &= ~(1 << move)
 
     def is_fully_expanded(self) -> bool:
         """
         Returns True if all possible moves from this state have been expanded into children.
         """
-        return len(self.children) == len(self.board.get_possible_moves("X"))  # or "O" if alternating
+        return self.untried_moves == 0
+
+    def is_terminal(self) -> bool:
+        """
+        Returns True if the game is over in this state.
+        """
+        return self.winner is not None
+
+    def has_children(self) -> bool:
+        """
+        Returns True if at least one child was expanded.
+        """
+        return self.children is not None
+
+    def child_nodes(self):
+        """
+        Returns the expanded children as a list.
+        """
+        if self.children is None:
+            return []
+        return [child for child in self.children if child is not None]
 
-    def best_child(self):
+    def best_child(self, c=1.4):
         """
         Returns the child node with the highest UCT (Upper Confidence Bound for Trees) value.
         Used to select the most promising node during the selection phase of MCTS.
         """
-        return max(self.children, key=lambda child: child.get_uct_value())
+        log_visits = math.log(self.visits + 1)
+        best, best_value = None, -1.0
+        for child in self.children:
+            if child is None:
+                continue
+            value = child.wins / (child.visits + 1e-6) + c * math.sqrt(log_visits / (child.visits + 1e-6))
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def most_visited_child(self):
+        """
+        Returns the child node that was visited the most, i.e. the move the search trusts the most.
+        """
+        return max(self.child_nodes(), key=lambda child: child.visits)
+
+    def get_child(self, move):
+        """
+        Returns the child reached by playing the given column, or None if it was not expanded.
+        """
+        if self.children is None:
+            return None
+        return self.children[move]
 
     def add_child(self, child):
         """
         Adds a new child node to this node.
         """
-        self.children.append(child)
+        if self.children is None:
+            self.children = [None] * 7
+        self.children[child.move] = child
 
     def get_uct_value(self, c=1.4) -> float:
         """
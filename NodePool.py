@@ -0,0 +1,66 @@
+from array import array
+
+NO_NODE = -1
+
+
+class NodePool:
+    def __init__(self):
+        """
+        Struct-of-arrays storage for MCTS nodes: node i is described by the i-th
+        entry of each array instead of by a Python object, which takes about
+        27 bytes per node and makes million-node searches fit in memory.
+        Children of a node are linked through first_child / next_sibling.
+        """
+        self.visits = array("I")
+        self.wins = array("d")
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.move = array("b")
+        self.untried = array("b")  # bitmask of the columns not expanded yet, -1 before the first expansion
+        self.winner = array("b")  # 0 unknown, 1 win for the player who moved, 2 tie
+
+    def __len__(self):
+        return len(self.visits)
+
+    def add_node(self, parent=NO_NODE, move=NO_NODE):
+        """
+        Appends a node and links it as the first child of its parent.
+
+        Returns:
+        - The index of the new node.
+        """
+        index = len(self.visits)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.move.append(move)
+        self.untried.append(-1)
+        self.winner.append(0)
+        if parent == NO_NODE:
+            self.next_sibling.append(NO_NODE)
+        else:
+            self.next_sibling.append(self.first_child[parent])
+            self.first_child[parent] = index
+        return index
+
+    def children(self, index):
+        """
+        Returns the indices of the children of a node.
+        """
+        children = []
+        child = self.first_child[index]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def get_child(self, index, move):
+        """
+        Returns the index of the child reached by the given column, or NO_NODE.
+        """
+        child = self.first_child[index]
+        while child != NO_NODE and self.move[child] != move:
+            child = self.next_sibling[child]
+        return child
@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+import struct
+import sys
+import numpy as np
+from BitBoard import COLUMN_BITS, WIDTH, BitBoard
+from MCTS import other_player
+from NodeMCTS import NodeMCTS
+from PUCTMCTS import PUCTMCTS
+
+MAGIC = b"C4OB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, depth, number of positions
+COLUMN = (1 << COLUMN_BITS) - 1
+
+
+def mirror_key(key):
+    """
+    Reflects a position key left to right (column c becomes column 6 - c).
+    """
+    mirrored = 0
+    for col in range(WIDTH):
+        mirrored |= ((key >> (col * COLUMN_BITS)) & COLUMN) << ((WIDTH - 1 - col) * COLUMN_BITS)
+    return mirrored
+
+
+def canonical_key(board, player):
+    """
+    Returns the key of the position for the player to move, independent of colours
+    (stones of the player to move + occupied cells), in the smaller of its two mirror
+    orientations, and whether the position had to be mirrored to get it.
+    """
+    key = board.bitboards[player] + board.mask
+    mirrored = mirror_key(key)
+    return (mirrored, True) if mirrored < key else (key, False)
+
+
+class OpeningBook:
+    def __init__(self, keys, moves, values, depth):
+        """
+        Best moves of the opening positions, sorted by canonical key for binary search.
+
+        Parameters:
+        - keys: Sorted canonical keys (see canonical_key).
+        - moves: Best column of each position, in canonical orientation.
+        - values: Expected result of each position for the player to move, in percent (-100 loss, 100 win).
+        - depth: Number of plies covered by the book.
+        """
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.moves = np.asarray(moves, dtype=np.int8)
+        self.values = np.asarray(values, dtype=np.int8)
+        self.depth = depth
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, board, player):
+        """
+        Returns the (column, value) of the position with player to move, or None if it is not in the book.
+        """
+        if board.counter > self.depth or not len(self.keys):
+            return None
+        key, mirrored = canonical_key(board, player)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return None
+        move = int(self.moves[i])
+        return (WIDTH - 1 - move if mirrored else move), int(self.values[i])
+
+    def save(self, path):
+        """
+        Writes the book: a header, then the keys, moves and values arrays.
+        """
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.depth, len(self.keys)))
+            f.write(self.keys.astype("<u8").tobytes())
+            f.write(self.moves.tobytes())
+            f.write(self.values.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a book written by save.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Not an opening book: file too short.")
+            magic, version, depth, count = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("Not an opening book: bad magic number.")
+            if version != VERSION:
+                raise ValueError(f"Unsupported opening book version {version}.")
+            keys = np.fromfile(f, dtype="<u8", count=count)
+            moves = np.fromfile(f, dtype=np.int8, count=count)
+            values = np.fromfile(f, dtype=np.int8, count=count)
+        return cls(keys, moves, values, depth)
+
+
+def enumerate_positions(depth):
+    """
+    Lists one move sequence for every distinct (up to mirroring) position reachable
+    in at most depth plies, skipping finished games.
+    """
+    sequences = []
+    seen = set()
+    board = BitBoard()
+
+    def visit(player):
+        key, _ = canonical_key(board, player)
+        if key in seen:  # the ply count is part of the key, so equal keys are equal positions
+            return
+        seen.add(key)
+        sequences.append(list(board.history))
+        if board.counter == depth:
+            return
+        for col in board.get_legal_moves():
+            board.make_move(col, player)
+            if not board.is_won(col, player):
+                visit(other_player(player))
+            board.undo_move()
+
+    visit("X")
+    return sequences
+
+
+def search_position(job):
+    """
+    Searches one book position in a worker process.
+
+    Returns:
+    - The (canonical key, canonical move, value) entry of the position.
+    """
+    moves, simulation_limit, seed = job
+    board = BitBoard()
+    player = "X"
+    for col in moves:
+        board.make_move(col, player)
+        player = other_player(player)
+
+    mcts = PUCTMCTS(NodeMCTS(board, None), player, simulation_limit, seed=seed)
+    best = mcts.best_move()
+    win_rate = best.wins / best.visits if best.visits else 1.0
+    key, mirrored = canonical_key(board, player)
+    move = WIDTH - 1 - best.move if mirrored else best.move
+    return key, move, round(100 * (2 * win_rate - 1))
+
+
+def build_book(depth, simulation_limit=20000, workers=None, seed=0):
+    """
+    Builds an opening book by searching every position up to depth plies
+    with PUCTMCTS, spreading the positions over a process pool.
+
+    Parameters:
+    - depth: Number of plies covered.
+    - simulation_limit: Simulations per position.
+    - workers: Number of processes (default: number of CPUs).
+    - seed: Seed of the searches.
+    """
+    jobs = [(moves, simulation_limit, seed + i) for i, moves in enumerate(enumerate_positions(depth))]
+    with multiprocessing.Pool(workers) as pool:
+        entries = sorted(pool.imap_unordered(search_position, jobs))
+    keys, moves, values = zip(*entries)
+    return OpeningBook(keys, moves, values, depth)
+
+
+if __name__ == "__main__":
+    # python OpeningBook.py [depth] [simulations per position] [path (default: Connect4.BOOK_PATH)]
+    import Connect4
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    simulations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    path = sys.argv[3] if len(sys.argv) > 3 else Connect4.BOOK_PATH
+    book = build_book(depth, simulations)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    book.save(path)
+    print(f"Saved {len(book)} positions up to {depth} plies in {path}")
@@ -0,0 +1,82 @@
+import math
+from MCTS import MCTS, make_child, other_player
+from Policy import heuristic_playout, heuristic_priors
+
+
+class PUCTMCTS(MCTS):
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None, early_stop=False,
+                 seed=None, prior=None, rollout=None, c_puct=2.0):
+        """
+        Initializes an MCTS agent that selects moves with the PUCT rule, where a move prior
+        steers the search towards likely moves: a child is chosen by maximising
+            Q + c_puct * P * sqrt(N_parent + 1) / (1 + N_child)
+        with Q its win rate (the parent's for unvisited children) and P its prior.
+        Moves are expanded in that order instead of at random, and moves with a zero
+        prior (e.g. columns that hand the opponent an immediate win) are never searched.
+        Requires a BitBoard.
+
+        Parameters:
+        - initial_state: The root node containing the current game state.
+        - current_player: The player for whom the move is being calculated.
+        - simulation_limit, time_limit, early_stop, seed: As in MCTS.
+        - prior: Function (board, player) -> 7 column probabilities, e.g. a Policy.TreePrior
+          built on a trained DecisionTree or RandomForest (default: Policy.heuristic_priors).
+        - rollout: Playout function (default: Policy.heuristic_playout).
+        - c_puct: Weight of the prior-driven exploration term.
+        """
+        self.prior = prior or heuristic_priors
+        self.c_puct = c_puct
+        super().__init__(initial_state, current_player, simulation_limit, time_limit, early_stop, seed,
+                         rollout=rollout or heuristic_playout)
+
+    def select_move(self, node):
+        """
+        Returns the column with the highest PUCT score at the node, expanded or not.
+        """
+        first_play = 1 - node.wins / node.visits if node.visits else 0.5
+        scale = self.c_puct * math.sqrt(node.visits + 1)
+        children = node.children
+        best, best_value = None, -1.0
+        for move, prior in enumerate(node.priors):
+            if prior == 0:
+                continue
+            child = children[move] if children is not None else None
+            if child is None or child.visits == 0:
+                value = first_play + scale * prior
+            else:
+                value = child.wins / child.visits + scale * prior / (1 + child.visits)
+            if value > best_value:
+                best, best_value = move, value
+        return best
+
+    def run_iteration(self):
+        """
+        Runs one PUCT select/expand/simulate/backpropagate cycle.
+
+        Returns:
+        - The number of simulations played.
+        """
+        board = self.board
+        node = self.root
+        player = self.current_player  # player to move at node
+        while not node.is_terminal():
+            if node.priors is None:
+                node.priors = self.prior(board, player)
+                if node.untried_moves is None:
+                    node.set_untried_moves(board.get_legal_moves())
+            move = self.select_move(node)
+            child = node.get_child(move)
+            if child is None:
+                child = make_child(node, board, move)
+                node.add_child(child)
+                node.remove_untried_move(move)
+                node = child
+                break
+            board.make_move(move, player)
+            node = child
+            player = other_player(player)
+
+        result = self.simulation(node)
+        self.backpropagation(node, result)
+        self.reset_board()
+        return 1
@@ -0,0 +1,159 @@
+from BitBoard import BOARD_MASK, BOTTOM_MASK, COLUMN_BITS, WIDTH
+from MCTS import other_player
+from Solver import winning_cells
+
+CENTER_WEIGHTS = [1, 2, 3, 4, 3, 2, 1]  # central columns take part in more lines of four
+
+
+def columns_of(bits):
+    """
+    Returns the columns of the set bits of a bitmask.
+    """
+    columns = []
+    while bits:
+        low = bits & -bits
+        columns.append((low.bit_length() - 1) // COLUMN_BITS)
+        bits ^= low
+    return columns
+
+
+def tactical_moves(board, player):
+    """
+    Finds the forced moves of the player to move on a BitBoard.
+
+    Returns:
+    - wins: Bitmask of the playable cells that win at once.
+    - blocks: Bitmask of the playable cells where the opponent would win next.
+    - safe: Bitmask of the playable cells that do not give the opponent a winning cell right above.
+    """
+    mask = board.mask
+    playable = (mask + BOTTOM_MASK) & BOARD_MASK
+    wins = winning_cells(board.bitboards[player], mask) & playable
+    threats = winning_cells(board.bitboards[other_player(player)], mask)
+    return wins, threats & playable, playable & ~(threats >> 1)
+
+
+def heuristic_priors(board, player):
+    """
+    Returns a probability for each of the 7 columns, from cheap Connect Four knowledge:
+    winning moves first, then blocks of the opponent's immediate wins, otherwise
+    center preference, avoiding moves that let the opponent win right above.
+    """
+    wins, blocks, safe = tactical_moves(board, player)
+    if wins or blocks:
+        forced = columns_of(wins or blocks)
+        return [1 / len(forced) if col in forced else 0.0 for col in range(WIDTH)]
+
+    legal = board.get_legal_moves()
+    safe_columns = set(columns_of(safe)) or set(legal)
+    weights = [CENTER_WEIGHTS[col] if col in safe_columns else 0 for col in range(WIDTH)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def heuristic_playout(board, player, rng):
+    """
+    Plays a rollout where each side takes an immediate win when there is one, otherwise
+    blocks the opponent's immediate win, otherwise plays a safe column drawn with
+    center preference. The board (a BitBoard) is restored before returning.
+
+    Returns:
+    - The winner ("X" or "O"), or "." for a tie.
+    """
+    result = "."
+    played = 0
+    while not board.is_board_full():
+        wins, blocks, safe = tactical_moves(board, player)
+        if wins:
+            board.make_move(columns_of(wins)[0], player)
+            played += 1
+            result = player
+            break
+        if blocks:
+            move = columns_of(blocks)[0]
+        else:
+            candidates = columns_of(safe) or board.get_legal_moves()
+            move = rng.choices(candidates, [CENTER_WEIGHTS[col] for col in candidates])[0]
+        board.make_move(move, player)
+        played += 1
+        player = other_player(player)
+
+    for _ in range(played):
+        board.undo_move()
+    return result
+
+
+class TreePrior:
+    def __init__(self, model, weight=0.5):
+        """
+        Move prior from a trained move predictor (DecisionTree, CompiledTree or RandomForest
+        trained on the dataset columns: 42 cells and the player to move, labels 1-based columns),
+        mixed with heuristic_priors so that moves the predictor never chooses keep some weight.
+
+        Parameters:
+        - model: The trained predictor.
+        - weight: Share of the prior given to the predictor (the rest follows heuristic_priors).
+        """
+        if hasattr(model, "trees"):
+            self.trees = model.trees
+        elif hasattr(model, "compiled"):
+            self.trees = [model.compiled or model.compile()]
+        else:
+            self.trees = [model]
+        self.weight = weight
+
+    def predictions(self, board, player):
+        """
+        Returns the share of the trees voting for each column on the given BitBoard.
+        """
+        features = [cell for row in board.to_grid() for cell in row] + [player]
+        votes = [0.0] * WIDTH
+        for tree in self.trees:
+            label = tree.predict_one(features)
+            if label is not None and 1 <= int(label) <= WIDTH:
+                votes[int(label) - 1] += 1 / len(self.trees)
+        return votes
+
+    def __call__(self, board, player):
+        """
+        Returns a probability for each of the 7 columns.
+        """
+        base = heuristic_priors(board, player)
+        if max(base) == 1.0:
+            return base  # a single forced move
+        votes = [vote if base[col] > 0 else 0.0 for col, vote in enumerate(self.predictions(board, player))]
+        total = sum(votes)
+        if total == 0:
+            return base
+        return [(1 - self.weight) * b + self.weight * v / total for b, v in zip(base, votes)]
+
+
+class PriorPlayout:
+    def __init__(self, prior):
+        """
+        Rollout policy that samples every move from a prior (e.g. a TreePrior),
+        for use as the rollout of an MCTS agent.
+        """
+        self.prior = prior
+
+    def __call__(self, board, player, rng):
+        """
+        Plays a rollout sampled from the prior and restores the board.
+
+        Returns:
+        - The winner ("X" or "O"), or "." for a tie.
+        """
+        result = "."
+        played = 0
+        while not board.is_board_full():
+            move = rng.choices(range(WIDTH), self.prior(board, player))[0]
+            board.make_move(move, player)
+            played += 1
+            if board.is_won(move, player):
+                result = player
+                break
+            player = other_player(player)
+
+        for _ in range(played):
+            board.undo_move()
+        return result
@@ -0,0 +1,142 @@
+import math
+from MCTS import MCTS, other_player, playout
+from NodeMCTS import NodeMCTS
+from NodePool import NO_NODE, NodePool
+
+
+class PooledMCTS(MCTS):
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None, early_stop=False,
+                 seed=None, c=1.4):
+        """
+        Initializes an MCTS agent whose tree is stored in a NodePool (parallel arrays)
+        instead of NodeMCTS objects, for searches with millions of nodes.
+
+        Parameters:
+        - initial_state: The root node containing the current game state.
+        - current_player: The player for whom the move is being calculated.
+        - simulation_limit, time_limit, early_stop, seed: As in MCTS.
+        - c: Exploration constant of the UCT formula.
+        """
+        super().__init__(initial_state, current_player, simulation_limit, time_limit, early_stop, seed, c=c)
+
+    def set_root(self, node):
+        """
+        Makes the given node the root of the search and starts a new pool.
+        """
+        super().set_root(node)
+        self.pool = NodePool()
+        self.pool.add_node()
+
+    def update_root(self, board):
+        """
+        Moves the root to the given board, starting a new tree.
+        """
+        self.set_root(NodeMCTS(board, None))
+
+    def best_pooled_child(self, index):
+        """
+        Returns the child of the node with the highest UCT value.
+        """
+        pool = self.pool
+        log_visits = math.log(pool.visits[index] + 1)
+        best, best_value = NO_NODE, -1.0
+        child = pool.first_child[index]
+        while child != NO_NODE:
+            visits = pool.visits[child] + 1e-6
+            value = pool.wins[child] / visits + self.c * math.sqrt(log_visits / visits)
+            if value > best_value:
+                best, best_value = child, value
+            child = pool.next_sibling[child]
+        return best
+
+    def run_iteration(self):
+        """
+        Runs one select/expand/simulate/backpropagate cycle on the pool.
+        The side to move is derived from the depth, so nodes do not store players.
+
+        Returns:
+        - The number of simulations played.
+        """
+        pool = self.pool
+        board = self.board
+        index = 0
+        player = self.current_player  # player to move at the current node
+
+        # Selection
+        while pool.untried[index] == 0 and pool.first_child[index] != NO_NODE and not pool.winner[index]:
+            index = self.best_pooled_child(index)
+            board.make_move(pool.move[index], player)
+            player = other_player(player)
+
+        # Expansion
+        if not pool.winner[index]:
+            if pool.untried[index] == -1:
+                pool.untried[index] = sum(1 << move for move in board.get_legal_moves())
+            if pool.untried[index]:
+                moves = [move for move in range(7) if pool.untried[index] >> move & 1]
+                move = self.rng.choice(moves)
+                pool.untried[index] &= ~(1 << move)
+                board.make_move(move, player)
+                index = pool.add_node(index, move)
+                if board.is_won(move, player):
+                    pool.winner[index] = 1
+                elif board.is_board_full():
+                    pool.winner[index] = 2
+                    pool.untried[index] = 0
+                player = other_player(player)
+
+        # Simulation
+        mover = other_player(player)  # player who made the move leading to the leaf
+        if pool.winner[index] == 1:
+            result = mover
+        elif pool.winner[index] == 2:
+            result = "."
+        else:
+            result = playout(board, player, self.rng)
+
+        # Backpropagation
+        while index != NO_NODE:
+            pool.visits[index] += 1
+            if result == mover:
+                pool.wins[index] += 1
+            elif result == ".":
+                pool.wins[index] += 0.5
+            mover = other_player(mover)
+            index = pool.parent[index]
+
+        self.reset_board()
+        return 1
+
+    def root_children(self):
+        """
+        Returns one NodeMCTS per expanded root move, carrying its statistics from the pool.
+        """
+        children = []
+        for index in self.pool.children(0):
+            child = NodeMCTS(parent=self.root, move=self.pool.move[index], player=self.current_player)
+            child.visits, child.wins = self.pool.visits[index], self.pool.wins[index]
+            children.append(child)
+        return children
+
+    def tree_shape(self):
+        """
+        Returns the number of nodes of the pool and the depth of its deepest node.
+        Parents are always added before their children, so depths are filled in one pass.
+        """
+        depths = [0] * len(self.pool)
+        parent = self.pool.parent
+        for index in range(1, len(depths)):
+            depths[index] = depths[parent[index]] + 1
+        return len(depths), max(depths)
+
+    def check_for_win(self, leaf):
+        """
+        Checks if there is an immediate winning move for the current player.
+        The returned node is not part of the search tree.
+        """
+        move = self.winning_move()
+        if move is None:
+            return None
+        winning_node = NodeMCTS(parent=leaf, move=move, player=self.current_player)
+        winning_node.winner = self.current_player
+        return winning_node
@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+import numpy as np
+from CompiledTree import NO_LABEL, CompiledTree
+from DecisionTree import DecisionTree
+
+# Training data of the current process, attached from shared memory by attach_training_data
+TRAINING_DATA = {}
+
+
+def attach_training_data(codes_spec, labels_spec, classes, feature_values, tree_params):
+    """
+    Pool initializer: maps the shared code matrix and labels into this process without copying them.
+    Each spec is a (shared memory name, shape, dtype) triple.
+    """
+    TRAINING_DATA.clear()
+    blocks = []
+    for key, (name, shape, dtype) in (("codes", codes_spec), ("y_codes", labels_spec)):
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)  # keeps the mapping alive as long as the arrays
+        TRAINING_DATA[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    TRAINING_DATA.update(blocks=blocks, classes=classes, feature_values=feature_values, tree_params=tree_params)
+
+
+def train_tree(seed):
+    """
+    Trains one tree of the forest on a bootstrap sample of the attached training data.
+
+    Returns:
+    - The (feature, children, value) arrays of the compiled tree.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = len(TRAINING_DATA["y_codes"])
+    tree = DecisionTree(seed=rng.integers(2 ** 32), **TRAINING_DATA["tree_params"])
+    tree.fit_encoded(TRAINING_DATA["codes"], TRAINING_DATA["y_codes"], TRAINING_DATA["classes"],
+                     TRAINING_DATA["feature_values"], samples=rng.integers(n_samples, size=n_samples))
+    compiled = tree.compile()
+    return compiled.feature, compiled.children, compiled.value
+
+
+class RandomForest:
+    def __init__(self, n_trees=50, min_sample_split=2, max_depth=15, n_features=None, workers=None, seed=None):
+        """
+        Initializes a random forest of ID3 decision trees (bagging with random feature subsets).
+
+        Parameters:
+        - n_trees: Number of trees.
+        - min_sample_split, max_depth: As in DecisionTree, for every tree.
+        - n_features: Number of features drawn at every node (default: half of the features; the
+          board cells take only three values each, so the usual square root leaves too little to split on).
+        - workers: Number of processes training trees in parallel (default: number of CPUs).
+        - seed: Seed of the bootstrap samples and feature subsets.
+        """
+        self.n_trees = n_trees
+        self.min_sample_split = min_sample_split
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.trees = []
+
+    def fit(self, X, y):
+        """
+        Trains the trees in a process pool. The encoded training matrix is placed in
+        shared memory once and mapped by every worker instead of being pickled to it;
+        each tree trains on a bootstrap sample given as indices into that matrix.
+        """
+        codes, feature_values = DecisionTree.encode(X)
+        classes, y_codes = np.unique(np.asarray(y), return_inverse=True)
+        y_codes = y_codes.reshape(-1).astype(np.int64)
+        classes = classes.tolist()
+        n_features = self.n_features or max(1, codes.shape[1] // 2)
+        tree_params = {"min_sample_split": self.min_sample_split, "max_depth": self.max_depth,
+                       "n_features": n_features}
+        seeds = np.random.SeedSequence(self.seed).generate_state(self.n_trees).tolist()
+
+        blocks = []
+        try:
+            specs = []
+            for array in (codes, y_codes):
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                specs.append((block.name, array.shape, array.dtype.str))
+            init_args = (specs[0], specs[1], classes, feature_values, tree_params)
+
+            if self.workers == 1:
+                attach_training_data(*init_args)
+                results = [train_tree(seed) for seed in seeds]
+                TRAINING_DATA.clear()
+            else:
+                with multiprocessing.Pool(self.workers, initializer=attach_training_data, initargs=init_args) as pool:
+                    results = pool.map(train_tree, seeds)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        self.trees = [CompiledTree(feature, children, value, classes, feature_values)
+                      for feature, children, value in results]
+
+    def votes(self, X):
+        """
+        Returns the (n_samples, n_classes) matrix of the number of trees voting for each class.
+        Samples are encoded once and every tree evaluates all of them at once.
+        """
+        codes = self.trees[0].encode(X)
+        n_classes = len(self.trees[0].classes)
+        votes = np.zeros((len(codes), n_classes + 1), dtype=np.int32)  # last column: no prediction
+        rows = np.arange(len(codes))
+        for tree in self.trees:
+            predicted = tree.predict_codes(codes)
+            votes[rows, np.where(predicted == NO_LABEL, n_classes, predicted)] += 1
+        return votes[:, :n_classes]
+
+    def predict_batch(self, X, missing=None):
+        """
+        Predicts the majority vote of the trees for every sample of X
+        (missing for samples no tree has a prediction for).
+        """
+        votes = self.votes(X)
+        predicted = votes.argmax(axis=1)
+        labels = np.asarray(self.trees[0].classes)
+        if (votes.max(axis=1) == 0).any():
+            labels = np.append(labels.astype(object), missing)
+            predicted[votes.max(axis=1) == 0] = -1
+        return labels[predicted]
+
+    def predict(self, X):
+        """
+        Predicts the class labels for the input data X.
+        """
+        return list(self.predict_batch(X))
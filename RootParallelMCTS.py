@@ -0,0 +1,113 @@
+import math
+import multiprocessing
+import os
+import random
+from MCTS import MCTS, other_player
+from NodeMCTS import NodeMCTS
+
+
+def search_worker(board, current_player, simulation_limit, time_limit, seed):
+    """
+    Runs one independent MCTS search inside a worker process.
+
+    Returns:
+    - A dict mapping each root move to its (visits, wins) pair.
+    """
+    mcts = MCTS(NodeMCTS(board, None), current_player, simulation_limit, time_limit, seed=seed)
+    mcts.best_move()
+    return {child.move: (child.visits, child.wins) for child in mcts.root.child_nodes()}
+
+
+class RootParallelMCTS:
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None,
+                 workers=None, seed=None, pool=None):
+        """
+        Initializes a root-parallel MCTS agent.
+        Every worker process grows its own tree from the same root with its own seed,
+        and the visit/win counts of the root moves are merged before choosing.
+
+        Parameters:
+        - initial_state: The root node containing the current game state.
+        - current_player: The player for whom the move is being calculated.
+        - simulation_limit: Total number of simulations, split evenly between the workers.
+        - time_limit: Wall-clock budget per move in seconds, applied to every worker (None for no limit).
+        - workers: Number of worker processes (default: number of CPUs).
+        - seed: Seed used to derive the per-worker seeds (None for a random seed).
+        - pool: An existing multiprocessing.Pool to share; otherwise one is created and kept across moves.
+        """
+        self.simulation_limit = simulation_limit
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.current_player = current_player
+        self.rng = random.Random(seed)
+        self.pool = pool
+        self.owns_pool = pool is None
+        self.set_root(initial_state)
+
+    def set_root(self, node):
+        """
+        Makes the given node the root of the search.
+        """
+        node.parent = None
+        node.player = other_player(self.current_player)
+        node.children = None
+        self.root = node
+
+    def update_root(self, board):
+        """
+        Moves the root to the given board. Worker trees are rebuilt on every move.
+        """
+        self.set_root(NodeMCTS(board, None))
+
+    def get_pool(self):
+        """
+        Returns the worker pool, starting it on first use so the startup cost is paid once.
+        """
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        return self.pool
+
+    def close(self):
+        """
+        Shuts down the worker pool if this agent created it.
+        """
+        if self.pool is not None and self.owns_pool:
+            self.pool.close()
+            self.pool.join()
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def best_move(self):
+        """
+        Runs the searches in parallel and returns the root child with the most merged visits.
+        """
+        local = MCTS(self.root, self.current_player, 1)
+        winning_node = local.check_for_win(self.root)
+        if winning_node:
+            return winning_node
+
+        per_worker = None
+        if self.simulation_limit is not None:
+            per_worker = max(1, math.ceil(self.simulation_limit / self.workers))
+        jobs = [(self.root.board, self.current_player, per_worker, self.time_limit, self.rng.getrandbits(32))
+                for _ in range(self.workers)]
+
+        merged = {}
+        for stats in self.get_pool().starmap(search_worker, jobs):
+            for move, (visits, wins) in stats.items():
+                child = merged.get(move)
+                if child is None:
+                    child = NodeMCTS(parent=self.root, move=move, player=self.current_player)
+                    merged[move] = child
+                child.visits += visits
+                child.wins += wins
+
+        for child in merged.values():
+            self.root.add_child(child)
+        self.root.visits = sum(child.visits for child in merged.values())
+        return self.root.most_visited_child()
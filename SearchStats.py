@@ -0,0 +1,198 @@
+import sys
+import time
+from copy import deepcopy
+
+PHASES = ("selection", "expansion", "simulation", "backpropagation")
+
+
+class SearchStats:
+    def __init__(self):
+        """
+        Statistics of one MCTS search, filled in by SearchInstruments.
+
+        Attributes:
+        - source: How the move was chosen ("search", "win", "book" or "solver").
+        - iterations: Simulations played.
+        - elapsed: Wall-clock time of the search, in seconds.
+        - phase_times: Seconds spent in each phase; "other" is the rest (loop, clock checks,
+          and the phases a subclass runs inline instead of through the MCTS methods).
+        - rollouts, rollout_moves: Number of playouts and moves played in them.
+        - tree_size, tree_depth: Nodes in the tree and depth of the deepest one, at the end of the search.
+        - nodes_allocated: Nodes added to the tree during the search (tree reuse excluded).
+        - allocated_blocks: Change in the number of memory blocks held by the interpreter.
+        - root_children: For each searched root move, a dict with its move, visits, wins and win rate.
+        - move: The chosen column.
+        """
+        self.source = "search"
+        self.iterations = 0
+        self.elapsed = 0.0
+        self.phase_times = dict.fromkeys(PHASES + ("other",), 0.0)
+        self.rollouts = 0
+        self.rollout_moves = 0
+        self.tree_size = 0
+        self.tree_depth = 0
+        self.nodes_allocated = 0
+        self.allocated_blocks = 0
+        self.root_children = []
+        self.move = None
+
+    @property
+    def simulations_per_second(self) -> float:
+        return self.iterations / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def average_rollout_length(self) -> float:
+        return self.rollout_moves / self.rollouts if self.rollouts else 0.0
+
+    def as_dict(self):
+        """
+        Returns the statistics as a JSON-serializable dict.
+        """
+        stats = dict(vars(self))
+        stats["phase_times"] = dict(self.phase_times)
+        stats["root_children"] = [dict(child) for child in self.root_children]
+        stats["simulations_per_second"] = self.simulations_per_second
+        stats["average_rollout_length"] = self.average_rollout_length
+        return stats
+
+    def __str__(self):
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phase_times.items())
+        visits = " ".join(f"{child['move'] + 1}:{child['visits']}" for child in self.root_children)
+        return (f"{self.source}: {self.iterations} simulations in {self.elapsed:.3f}s "
+                f"({self.simulations_per_second:.0f}/s); {phases}\n"
+                f"tree {self.tree_size} nodes, depth {self.tree_depth}, {self.nodes_allocated} new; "
+                f"average rollout {self.average_rollout_length:.1f} moves; root visits {visits}")
+
+
+class SearchInstruments:
+    def __init__(self, mcts, callback=None, interval=1.0):
+        """
+        Measures one search of an MCTS agent. attach() shadows the phase methods of the
+        agent (and make_move of its search board, to count rollout moves) with timed
+        wrappers on the instance; detach() removes them, so an agent that is not being
+        instrumented runs its plain methods.
+
+        Parameters:
+        - mcts: The agent.
+        - callback: Function called with a SearchStats snapshot every interval seconds of search.
+        - interval: Seconds between two callbacks.
+        """
+        self.mcts = mcts
+        self.callback = callback
+        self.interval = interval
+        self.stats = SearchStats()
+        self.board = None
+        self.wrapped = []
+
+    def timed(self, method, phase):
+        """
+        Returns a wrapper of method adding its running time to the phase.
+        """
+        phase_times = self.stats.phase_times
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            result = method(*args)
+            phase_times[phase] += clock() - start
+            return result
+        return wrapper
+
+    def timed_simulation(self, method):
+        """
+        Returns a wrapper of simulation that also counts playouts and their moves.
+        """
+        stats = self.stats
+        timed = self.timed(method, "simulation")
+
+        def wrapper(node):
+            moves = stats.rollout_moves
+            result = timed(node)
+            if stats.rollout_moves > moves:
+                stats.rollouts += 1
+            return result
+        return wrapper
+
+    def counted_make_move(self, method):
+        """
+        Returns a wrapper of the search board's make_move counting the moves played in playouts.
+        """
+        stats = self.stats
+
+        def wrapper(x, current_player):
+            stats.rollout_moves += 1
+            return method(x, current_player)
+        return wrapper
+
+    def attach(self):
+        """
+        Installs the wrappers and starts the clocks.
+        """
+        mcts = self.mcts
+        for phase in PHASES + ("backpropagate_counts",):
+            method = getattr(mcts, phase)
+            wrapper = (self.timed_simulation(method) if phase == "simulation"
+                       else self.timed(method, "backpropagation" if phase == "backpropagate_counts" else phase))
+            setattr(mcts, phase, wrapper)
+            self.wrapped.append(phase)
+
+        self.board = mcts.board
+        simulation = mcts.simulation
+        make_move = self.board.make_move
+        counted = self.counted_make_move(make_move)
+
+        def simulation_counting_moves(node):
+            self.board.make_move = counted  # only moves played inside simulation are rollout moves
+            try:
+                return simulation(node)
+            finally:
+                del self.board.make_move
+        mcts.simulation = simulation_counting_moves
+
+        self.nodes_before = mcts.tree_shape()[0]
+        self.blocks_before = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        self.next_callback = self.start + self.interval
+
+    def detach(self):
+        """
+        Removes the wrappers, restoring the agent's own methods.
+        """
+        for phase in self.wrapped:
+            self.mcts.__dict__.pop(phase, None)
+        self.board.__dict__.pop("make_move", None)
+        self.wrapped = []
+
+    def snapshot(self):
+        """
+        Returns the statistics of the search so far.
+        """
+        mcts = self.mcts
+        stats = self.stats
+        stats.iterations = mcts.iterations
+        stats.elapsed = time.perf_counter() - self.start
+        stats.phase_times["other"] = max(0.0, stats.elapsed - sum(stats.phase_times[phase] for phase in PHASES))
+        stats.tree_size, stats.tree_depth = mcts.tree_shape()
+        stats.nodes_allocated = stats.tree_size - self.nodes_before
+        stats.allocated_blocks = sys.getallocatedblocks() - self.blocks_before
+        stats.root_children = [{"move": child.move, "visits": child.visits, "wins": child.wins,
+                                "win_rate": child.wins / child.visits if child.visits else 0.0}
+                               for child in sorted(mcts.root_children(), key=lambda child: child.move)]
+        return stats
+
+    def tick(self):
+        """
+        Calls the callback when its interval has elapsed. Called by the search at every clock check.
+        """
+        if self.callback is not None and time.perf_counter() >= self.next_callback:
+            self.callback(deepcopy(self.snapshot()))
+            self.next_callback = time.perf_counter() + self.interval
+
+    def finish(self, node, source):
+        """
+        Returns the final statistics of the search that chose the given node.
+        """
+        stats = self.snapshot()
+        stats.source = source
+        stats.move = node.move if node is not None else None
+        return stats
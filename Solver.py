@@ -0,0 +1,249 @@
+import time
+from BitBoard import BitBoard, BOARD_MASK, BOTTOM_MASK, COLUMN_BITS, HEIGHT, WIDTH, column_mask
+
+CELLS = WIDTH * HEIGHT
+MIN_SCORE = -(CELLS // 2) + 3
+MAX_SCORE = (CELLS + 1) // 2 - 3
+COLUMN_ORDER = [3, 2, 4, 1, 5, 0, 6]  # center first
+COLUMN_MASKS = [column_mask(col) for col in range(WIDTH)]
+
+
+class SolverTimeout(Exception):
+    """
+    Raised inside the search when the time budget of a solve is exhausted.
+    """
+
+
+def winning_cells(position, mask):
+    """
+    Returns the bitmask of empty cells that would complete four in a row for the player owning position.
+    """
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    # Horizontal and both diagonals
+    for shift in (COLUMN_BITS, HEIGHT, COLUMN_BITS + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def popcount(bits) -> int:
+    """
+    Returns the number of set bits.
+    """
+    return bin(bits).count("1")
+
+
+def score_to_value(score) -> int:
+    """
+    Converts a solver score into the game-theoretic value: 1 win, 0 draw, -1 loss.
+    """
+    return (score > 0) - (score < 0)
+
+
+class Solver:
+    def __init__(self, table_size=2000000):
+        """
+        Initializes an exact Connect Four solver: negamax with alpha-beta pruning,
+        center-first and threat-based move ordering, a transposition table,
+        null-window search and iterative deepening.
+
+        Scores follow the usual convention: a position won with the k-th last
+        own stone scores k (faster wins score higher), 0 is a draw, negative is a loss.
+
+        Parameters:
+        - table_size: Maximum number of positions kept in the transposition table before it is cleared.
+        """
+        self.table_size = table_size
+        self.table = {}  # key -> upper bound of the score, shifted to stay positive
+        self.horizon = CELLS
+        self.nodes = 0
+        self.deadline = None
+
+    @staticmethod
+    def encode(board, current_player):
+        """
+        Returns the (position, mask, moves) triple of a board, where position
+        holds the stones of the player to move.
+        """
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+        return board.bitboards[current_player], board.mask, board.counter
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        """
+        Recursively scores a position in which the player to move cannot win immediately.
+        Returns a fail-soft value within the (alpha, beta) window.
+        """
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SolverTimeout()
+
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent_win = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                return -((CELLS - moves) // 2)  # two threats cannot both be blocked
+            possible = forced
+        possible &= ~(opponent_win >> 1)  # never play right below an opponent's winning cell
+        if not possible:
+            return -((CELLS - moves) // 2)
+
+        if moves >= CELLS - 2:
+            return 0
+        if moves >= self.horizon:
+            return 0
+
+        low = -((CELLS - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+
+        high = (CELLS - 1 - moves) // 2
+        key = position + mask
+        stored = self.table.get(key)
+        if stored is not None:
+            high = stored + MIN_SCORE - 1
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        candidates = []
+        for order, col in enumerate(COLUMN_ORDER):
+            move = possible & COLUMN_MASKS[col]
+            if move:
+                threats = popcount(winning_cells(position | move, mask))
+                candidates.append((-threats, order, move))
+        candidates.sort()
+
+        opponent = position ^ mask
+        for _, _, move in candidates:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def search(self, position, mask, moves, weak=False):
+        """
+        Finds the score of a position by narrowing the score range with null-window searches.
+        """
+        if winning_cells(position, mask) & (mask + BOTTOM_MASK) & BOARD_MASK:
+            return (CELLS + 1 - moves) // 2
+
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        if weak:
+            low, high = -1, 1
+
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            score = self.negamax(position, mask, moves, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def solve_encoded(self, position, mask, moves, weak=False, time_limit=None, step=8):
+        """
+        Solves an encoded position with iterative deepening: the game is first searched
+        up to a move horizon that grows by step, and any win or loss proven within the
+        horizon is returned at once; the last iteration searches to the end of the game.
+
+        Returns:
+        - The score, or None if the time limit was reached before the position was solved.
+        """
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        try:
+            horizon = moves + step
+            while horizon < CELLS:
+                self.horizon = horizon
+                horizon_table, self.table = self.table, {}
+                try:
+                    score = self.search(position, mask, moves, weak)
+                finally:
+                    self.table = horizon_table
+                if score != 0:
+                    return score
+                horizon += step
+            self.horizon = CELLS
+            return self.search(position, mask, moves, weak)
+        except SolverTimeout:
+            return None
+        finally:
+            self.horizon = CELLS
+            self.deadline = None
+
+    def solve(self, board, current_player, weak=False, time_limit=None):
+        """
+        Returns the exact score of the board with current_player to move
+        (None if time_limit seconds were not enough). With weak=True only
+        the sign of the score (win / draw / loss) is computed, which is faster.
+        """
+        position, mask, moves = self.encode(board, current_player)
+        return self.solve_encoded(position, mask, moves, weak, time_limit)
+
+    def analyze(self, board, current_player, weak=False, time_limit=None):
+        """
+        Scores every column for the player to move.
+
+        Returns:
+        - A list of 7 scores (None for full columns, or for columns left unsolved when time ran out).
+        """
+        position, mask, moves = self.encode(board, current_player)
+        return self.analyze_encoded(position, mask, moves, weak, time_limit)
+
+    def analyze_encoded(self, position, mask, moves, weak=False, time_limit=None):
+        """
+        Scores every column of an encoded position (see analyze).
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        scores = [None] * WIDTH
+        for col in COLUMN_ORDER:
+            move = (mask + BOTTOM_MASK) & COLUMN_MASKS[col]
+            if not move:
+                continue
+            if winning_cells(position, mask) & move:
+                scores[col] = (CELLS + 1 - moves) // 2
+                continue
+            remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            score = self.solve_encoded(position ^ mask, mask | move, moves + 1, weak, remaining)
+            if score is not None:
+                scores[col] = -score
+        return scores
+
+    def best_move(self, board, current_player, weak=False, time_limit=None):
+        """
+        Returns the (column, score) pair of the best move, or (None, None) when the
+        time limit left a column unsolved and no proven win was found among the others.
+        """
+        scores = self.analyze(board, current_player, weak, time_limit)
+        best_col, best_score = None, None
+        unsolved = False
+        for col in COLUMN_ORDER:
+            if not board.is_legal_move(col):
+                continue
+            if scores[col] is None:
+                unsolved = True
+            elif best_score is None or scores[col] > best_score:
+                best_col, best_score = col, scores[col]
+        if unsolved and (best_score is None or best_score <= 0):
+            return None, None
+        return best_col, best_score
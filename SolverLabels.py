@@ -0,0 +1,234 @@
+import csv
+import multiprocessing
+import sqlite3
+import sys
+import numpy as np
+import BinaryDataset
+from BitBoard import BOARD_MASK, BOTTOM_MASK, HEIGHT, WIDTH, BitBoard, column_mask
+from OpeningBook import mirror_key
+from Solver import Solver, score_to_value
+
+SCORE_HEADER = [f"score_{col + 1}" for col in range(WIDTH)]
+LABEL_HEADER = ["value", "best_moves"]
+NO_SCORE = -128  # stored for full columns
+SOLVER = None  # solver of the current worker process, kept so its transposition table is reused
+
+
+def canonical_position(position, mask):
+    """
+    Returns the (position, mask) pair of the smaller of the two mirror orientations
+    (by key, as in OpeningBook.canonical_key) and whether it had to be mirrored.
+    """
+    mirrored_position, mirrored_mask = mirror_key(position), mirror_key(mask)
+    if mirrored_position + mirrored_mask < position + mask:
+        return mirrored_position, mirrored_mask, True
+    return position, mask, False
+
+
+class SolveCache:
+    def __init__(self, path):
+        """
+        Persistent cache of solved positions (SQLite). Positions are stored once per
+        mirror pair, from the point of view of the player to move, with the score of
+        every column; weak entries only hold the sign of the scores.
+
+        Parameters:
+        - path: Path of the SQLite file (created if missing, extended if it exists).
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solved (key INTEGER, weak INTEGER, scores BLOB, "
+                                "PRIMARY KEY (key, weak)) WITHOUT ROWID")
+
+    def get(self, key, weak=False):
+        """
+        Returns the 7 column scores of a canonical key (None for full columns), or None on a miss.
+        An exact entry also answers weak requests.
+        """
+        rows = self.connection.execute("SELECT weak, scores FROM solved WHERE key = ? AND weak <= ? "
+                                       "ORDER BY weak", (key, int(weak))).fetchall()
+        if not rows:
+            return None
+        return [None if score == NO_SCORE else score for score in np.frombuffer(rows[0][1], dtype=np.int8).tolist()]
+
+    def put_many(self, entries, weak=False):
+        """
+        Stores (key, scores) pairs.
+        """
+        rows = [(key, int(weak), np.array([NO_SCORE if score is None else score for score in scores],
+                                          dtype=np.int8).tobytes()) for key, scores in entries]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO solved VALUES (?, ?, ?)", rows)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solved").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def weak_scores(scores):
+    """
+    Reduces column scores to their signs (1 win, 0 draw, -1 loss), the only part a weak solve
+    proves; the solver still gives exact scores for immediate wins and losses, which would
+    otherwise hide the other winning columns from the best-move set.
+    """
+    return [None if score is None else score_to_value(score) for score in scores]
+
+
+def solve_position(job):
+    """
+    Scores every column of one canonical position in a worker process.
+
+    Parameters:
+    - job: A (position, mask, moves, weak, time_limit) tuple.
+
+    Returns:
+    - The key and the 7 column scores, or None for the scores when the time limit was reached.
+    """
+    global SOLVER
+    position, mask, moves, weak, time_limit = job
+    if SOLVER is None:
+        SOLVER = Solver()
+    scores = SOLVER.analyze_encoded(position, mask, moves, weak, time_limit)
+    playable = (mask + BOTTOM_MASK) & BOARD_MASK
+    if any(scores[col] is None for col in range(WIDTH) if playable & column_mask(col)):
+        return position + mask, None
+    return position + mask, weak_scores(scores) if weak else scores
+
+
+def labels(scores):
+    """
+    Returns the exact value (1 win, 0 draw, -1 loss for the player to move) and the
+    best columns (0-based; all columns reaching the best score) of a score vector.
+    """
+    best = max(score for score in scores if score is not None)
+    return score_to_value(best), [col for col, score in enumerate(scores) if score == best]
+
+
+def label_positions(positions, cache_path="solved_positions.sqlite", weak=False, time_limit=None, workers=None):
+    """
+    Solves a list of positions, answering the positions already in the cache from it
+    and solving the others (each distinct position once) across a process pool.
+
+    Parameters:
+    - positions: List of (position, mask, moves) triples, position holding the stones of the player to move.
+    - cache_path: Path of the SolveCache.
+    - weak: Only compute win / draw / loss (much faster than exact scores).
+    - time_limit: Seconds allowed per position; positions not solved in time get no label.
+    - workers: Number of processes (default: number of CPUs).
+
+    Returns:
+    - For each position, its 7 column scores (None for full columns; with weak, only their
+      signs), or None when it was not solved.
+    """
+    canonical = [canonical_position(position, mask) + (moves,) for position, mask, moves in positions]
+    solved = {}
+    with SolveCache(cache_path) as cache:
+        jobs = {}
+        for position, mask, _, moves in canonical:
+            key = position + mask
+            if key in solved or key in jobs:
+                continue
+            scores = cache.get(key, weak)
+            if scores is not None:
+                solved[key] = weak_scores(scores) if weak else scores  # exact entries also answer weak requests
+            else:
+                jobs[key] = (position, mask, moves, weak, time_limit)
+
+        if jobs:
+            new_entries = []
+            with multiprocessing.Pool(workers) as pool:
+                for key, scores in pool.imap_unordered(solve_position, jobs.values()):
+                    if scores is not None:
+                        solved[key] = scores
+                        new_entries.append((key, scores))
+                    if len(new_entries) >= 1000:
+                        cache.put_many(new_entries, weak)
+                        new_entries = []
+            cache.put_many(new_entries, weak)
+
+    results = []
+    for position, mask, mirrored, _ in canonical:
+        scores = solved.get(position + mask)
+        results.append(scores[::-1] if scores is not None and mirrored else scores)
+    return results
+
+
+def row_position(row):
+    """
+    Returns the (position, mask, moves) triple of a dataset row (42 cells, row 0 at the top, then the player).
+    """
+    grid = [row[y * WIDTH:(y + 1) * WIDTH] for y in range(HEIGHT)]
+    board = BitBoard.from_grid(grid)
+    return board.bitboards[row[WIDTH * HEIGHT]], board.mask, board.counter
+
+
+def relabel_csv(source, target, with_scores=False, **options):
+    """
+    Writes a copy of a dataset CSV (generated by Data_Generator or imported, with or
+    without a byte-order mark) with the solver labels appended to every row: the exact
+    value, the best columns (1-based, separated by spaces) and, with with_scores,
+    the score of each column. Unsolved positions and full columns get empty fields.
+
+    Parameters:
+    - source, target: Paths of the input and output CSV files.
+    - with_scores: Also write the score_1 ... score_7 columns.
+    - options: Passed to label_positions (cache_path, weak, time_limit, workers).
+    """
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if row]
+
+    all_scores = label_positions([row_position(row) for row in rows], **options)
+
+    with open(target, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header + LABEL_HEADER + (SCORE_HEADER if with_scores else []))
+        for row, scores in zip(rows, all_scores):
+            if scores is None:
+                extra = ["", ""] + ([""] * WIDTH if with_scores else [])
+            else:
+                value, best = labels(scores)
+                extra = [value, " ".join(str(col + 1) for col in best)]
+                if with_scores:
+                    extra += ["" if score is None else score for score in scores]
+            writer.writerow(row + extra)
+    return sum(scores is not None for scores in all_scores)
+
+
+def relabel_binary(path, **options):
+    """
+    Fills the value field of every record of a binary dataset (.c4ds) in place
+    (NO_VALUE for the positions that could not be solved).
+
+    Parameters:
+    - path: Path of the binary dataset.
+    - options: Passed to label_positions (cache_path, weak, time_limit, workers).
+    """
+    records = BinaryDataset.load_dataset(path, mode="r+")
+    x_bits, o_bits = records["x_bits"].tolist(), records["o_bits"].tolist()
+    positions = [((o if player else x), x | o, bin(x | o).count("1"))
+                 for x, o, player in zip(x_bits, o_bits, records["player"].tolist())]
+    all_scores = label_positions(positions, **options)
+    records["value"] = [BinaryDataset.NO_VALUE if scores is None else labels(scores)[0] for scores in all_scores]
+    records.flush()
+    return sum(scores is not None for scores in all_scores)
+
+
+if __name__ == "__main__":
+    # python SolverLabels.py source.csv target.csv [time limit per position]
+    # python SolverLabels.py dataset.c4ds [time limit per position]
+    if sys.argv[1].endswith(BinaryDataset.BINARY_EXTENSION):
+        limit = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        solved = relabel_binary(sys.argv[1], time_limit=limit)
+    else:
+        limit = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        solved = relabel_csv(sys.argv[1], sys.argv[2], with_scores=True, time_limit=limit)
+    print(f"Solved {solved} positions")
@@ -0,0 +1,300 @@
+import heapq
+import math
+from collections import OrderedDict
+from MCTS import MCTS, other_player, playout
+from NodeMCTS import NodeMCTS
+
+
+class TableEntry:
+    __slots__ = ("player", "visits", "wins", "moves", "untried_moves", "winner")
+
+    def __init__(self, player, winner=None):
+        """
+        Statistics of one position, shared by every move order that reaches it.
+
+        Parameters:
+        - player: The player who made the last move in this position.
+        - winner: "X", "O" or "." if the position is terminal, None otherwise.
+        """
+        self.player = player
+        self.visits = 0
+        self.wins = 0
+        self.moves = []  # moves whose resulting position was added to the table
+        self.untried_moves = None
+        self.winner = winner
+
+
+class TranspositionTable:
+    def __init__(self, max_entries=1000000, eviction="lru"):
+        """
+        Bounded table mapping position keys to their search statistics.
+
+        Parameters:
+        - max_entries: Maximum number of positions kept in memory.
+        - eviction: "lru" drops the least recently used position,
+          "visits" drops the 10% least visited positions at once.
+        """
+        if eviction not in ("lru", "visits"):
+            raise ValueError("eviction must be 'lru' or 'visits'.")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.entries = OrderedDict()
+        self.pinned = set()  # keys never evicted (the roots of the searches using the table)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the entry stored for the key, or None (counting hits and misses).
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.eviction == "lru":
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry, keep=()):
+        """
+        Stores an entry. When the table is full, room is made before inserting it, so the
+        new entry is never the one evicted.
+
+        Parameters:
+        - key, entry: The position key and its statistics.
+        - keep: Keys that must not be evicted to make room (e.g. the current search path).
+        """
+        if key not in self.entries and len(self.entries) >= self.max_entries:
+            self.evict(self.pinned.union(keep))
+        self.entries[key] = entry
+
+    def evict(self, keep=frozenset()):
+        """
+        Frees room in the table according to the eviction policy, sparing the keys in keep.
+        """
+        if self.eviction == "lru":
+            for key in self.entries:  # oldest first
+                if key not in keep:
+                    del self.entries[key]
+                    self.evictions += 1
+                    return
+            return
+        count = max(1, len(self.entries) // 10)
+        candidates = (key for key in self.entries if key not in keep)
+        for key in heapq.nsmallest(count, candidates, key=lambda k: self.entries[k].visits):
+            del self.entries[key]
+            self.evictions += 1
+
+    def pin(self, key):
+        """
+        Protects a key from eviction until unpin is called.
+        """
+        self.pinned.add(key)
+
+    def unpin(self, key):
+        self.pinned.discard(key)
+
+    def hit_rate(self) -> float:
+        """
+        Returns the fraction of lookups that found an existing position. Lookups made
+        while descending through positions already in the tree count as hits, so this
+        measures table churn rather than transpositions (see TranspositionMCTS.stats).
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TranspositionMCTS(MCTS):
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None, early_stop=False,
+                 seed=None, table=None, max_entries=1000000, eviction="lru", c=1.4):
+        """
+        Initializes an MCTS agent whose tree is a DAG stored in a transposition table,
+        so positions reached through different move orders share their statistics.
+
+        Parameters:
+        - initial_state: The root node containing the current game state.
+        - current_player: The player for whom the move is being calculated.
+        - simulation_limit, time_limit, early_stop, seed: As in MCTS.
+        - table: An existing TranspositionTable to share (e.g. kept across moves).
+        - max_entries: Memory cap of a new table, in positions.
+        - eviction: Eviction policy of a new table ("lru" or "visits").
+        - c: Exploration constant of the UCT formula.
+        """
+        self.table = table if table is not None else TranspositionTable(max_entries, eviction)
+        self.stats = {}
+        self.root_key = None
+        self.expansions = 0
+        self.transpositions = 0
+        super().__init__(initial_state, current_player, simulation_limit, time_limit, early_stop, seed, c=c)
+
+    def set_root(self, node):
+        """
+        Makes the given node the root of the search and looks up its table entry.
+        """
+        super().set_root(node)
+        self.root_entry = self.lookup_or_create(self.root.player)
+        if self.root_key is not None:
+            self.table.unpin(self.root_key)
+        self.root_key = self.board.key()
+        self.table.pin(self.root_key)  # the root is never looked up again, LRU would drop it first
+
+    def update_root(self, board):
+        """
+        Moves the root to the given board. Statistics already in the table are reused.
+        """
+        self.set_root(NodeMCTS(board, None))
+
+    def lookup_or_create(self, player, move=None):
+        """
+        Returns the entry of the position on the search board, creating it on a miss.
+        """
+        key = self.board.key()
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.create_entry(key, player, move)
+        return entry
+
+    def create_entry(self, key, player, move=None, keep=()):
+        """
+        Adds the position on the search board to the table and returns its new entry.
+        The keys in keep (the path to the position) are not evicted to make room for it.
+        """
+        winner = None
+        if move is not None and self.board.is_won(move, player):
+            winner = player
+        elif self.board.is_board_full():
+            winner = "."
+        entry = TableEntry(player, winner)
+        self.table.put(key, entry, keep)
+        return entry
+
+    def select_move(self, entry):
+        """
+        Returns the expanded move with the highest UCT value from the position on the search board.
+        Moves whose position was evicted from the table are put back with the untried moves,
+        and None is returned so that they get expanded again.
+        """
+        best_move, best_value = None, -1.0
+        log_visits = math.log(entry.visits + 1)
+        for move in list(entry.moves):
+            self.board.make_move(move, other_player(entry.player))
+            child = self.table.entries.get(self.board.key())
+            self.board.undo_move()
+            if child is None:
+                entry.moves.remove(move)
+                entry.untried_moves.append(move)
+                return None
+            value = (child.wins / (child.visits + 1e-6)
+                     + self.c * math.sqrt(log_visits / (child.visits + 1e-6)))
+            if value > best_value:
+                best_move, best_value = move, value
+        return best_move
+
+    def run_iteration(self):
+        """
+        Runs one select/expand/simulate/backpropagate cycle on the DAG.
+
+        Returns:
+        - The number of simulations played.
+        """
+        entry = self.root_entry
+        path = [entry]
+        path_keys = [self.root_key]
+
+        while entry.winner is None:
+            if entry.untried_moves is None:
+                entry.untried_moves = self.board.get_legal_moves()
+            if not entry.untried_moves:
+                move = self.select_move(entry)
+                if move is None:
+                    continue
+                self.board.make_move(move, other_player(entry.player))
+                path_keys.append(self.board.key())
+                entry = self.table.get(path_keys[-1])
+                path.append(entry)
+                continue
+
+            move = entry.untried_moves.pop(self.rng.randrange(len(entry.untried_moves)))
+            player = other_player(entry.player)
+            self.board.make_move(move, player)
+            entry.moves.append(move)
+            key = self.board.key()
+            child = self.table.get(key)
+            self.expansions += 1
+            if child is None:
+                child = self.create_entry(key, player, move, path_keys)
+            else:  # the position was already reached through another move order
+                self.transpositions += 1
+            entry = child
+            path.append(entry)
+            break
+
+        result = entry.winner if entry.winner is not None else playout(self.board, other_player(entry.player), self.rng)
+        for node in path:
+            node.visits += 1
+            if result == node.player:
+                node.wins += 1
+            elif result == ".":
+                node.wins += 0.5
+        self.reset_board()
+        return 1
+
+    def root_children(self):
+        """
+        Returns one node per expanded root move, carrying the statistics found in the table.
+        """
+        children = []
+        for move in self.root_entry.moves:
+            self.board.make_move(move, self.current_player)
+            entry = self.table.entries.get(self.board.key())
+            self.board.undo_move()
+            if entry is not None:
+                child = NodeMCTS(parent=self.root, move=move, player=self.current_player)
+                child.visits, child.wins, child.winner = entry.visits, entry.wins, entry.winner
+                children.append(child)
+        return children
+
+    def tree_shape(self):
+        """
+        Returns the number of positions in the table. The table is a graph shared
+        between moves, so no depth is given (None).
+        """
+        return len(self.table), None
+
+    def check_for_win(self, leaf):
+        """
+        Checks if there is an immediate winning move for the current player.
+        The returned node is not part of the search tree.
+        """
+        move = self.winning_move()
+        if move is None:
+            return None
+        winning_node = NodeMCTS(parent=leaf, move=move, player=self.current_player)
+        winning_node.winner = self.current_player
+        return winning_node
+
+    def best_move(self):
+        """
+        Runs the search and returns the most visited root move.
+        Per-move statistics are stored in self.stats: table hits and misses, expansions,
+        expansions that reached a position already searched through another move order
+        (transpositions), hit rate (transpositions / expansions), table size and evictions.
+        """
+        hits, misses, evictions = self.table.hits, self.table.misses, self.table.evictions
+        self.expansions = self.transpositions = 0
+        best_node = super().best_move()
+        self.stats = {
+            "hits": self.table.hits - hits,
+            "misses": self.table.misses - misses,
+            "hit_rate": self.transpositions / self.expansions if self.expansions else 0.0,
+            "expansions": self.expansions,
+            "transpositions": self.transpositions,
+            "table_size": len(self.table),
+            "evictions": self.table.evictions - evictions,
+        }
+        return best_node
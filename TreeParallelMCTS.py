@@ -0,0 +1,191 @@
+import random
+import sys
+import threading
+import time
+from copy import deepcopy
+from MCTS import MCTS, CHECK_INTERVAL, make_child, other_player
+from NodeMCTS import NodeMCTS
+
+
+def gil_enabled() -> bool:
+    """
+    Returns True when the interpreter runs with the GIL (always True before Python 3.13).
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+class TreeParallelMCTS(MCTS):
+    def __init__(self, initial_state, current_player, simulation_limit=10000, time_limit=None,
+                 threads=4, virtual_loss=1, lock_stripes=64, force_threads=False, seed=None,
+                 solver_threshold=None, rollout=None, book=None, instrument=False, on_stats=None,
+                 stats_interval=1.0, c=1.4):
+        """
+        Initializes a tree-parallel MCTS agent where several threads search one shared tree.
+        A thread descending through a node adds a virtual loss to it, so the other threads
+        are steered towards different children until the real result is backpropagated.
+
+        Parameters:
+        - initial_state: The root node containing the current game state.
+        - current_player: The player for whom the move is being calculated.
+        - simulation_limit: Total number of simulations shared by all threads (None for no limit).
+        - time_limit: Wall-clock budget per move in seconds (None for no limit).
+        - threads: Number of search threads.
+        - virtual_loss: Number of lost visits added to a node while a thread is below it.
+        - lock_stripes: Number of locks protecting node statistics (nodes are hashed onto them).
+        - force_threads: Use several threads even with the GIL enabled, where they only add contention.
+        - seed: Seed used to derive the per-thread random number generators.
+        - solver_threshold, rollout, book, instrument, on_stats, stats_interval, c: As in MCTS.
+          The threads do not go through the phase methods, so instrumented searches
+          count their whole time as "other" and record no rollout lengths.
+        """
+        super().__init__(initial_state, current_player, simulation_limit, time_limit, seed=seed,
+                         solver_threshold=solver_threshold, rollout=rollout, book=book, instrument=instrument,
+                         on_stats=on_stats, stats_interval=stats_interval, c=c)
+        if gil_enabled() and not force_threads:
+            threads = 1
+        self.threads = threads
+        self.virtual_loss = virtual_loss
+        self.locks = [threading.Lock() for _ in range(lock_stripes)]
+        self.counter_lock = threading.Lock()
+
+    def lock_for(self, node):
+        """
+        Returns the lock stripe guarding the given node.
+        """
+        return self.locks[(id(node) >> 4) % len(self.locks)]
+
+    def claim_iterations(self, deadline):
+        """
+        Reserves the next batch of iterations for a thread.
+        Returns the batch size, or 0 when the search budget is used up.
+        """
+        with self.counter_lock:
+            if self.stopped or (deadline is not None and time.perf_counter() >= deadline):
+                return 0
+            batch = CHECK_INTERVAL
+            if self.simulation_limit is not None:
+                batch = min(batch, self.simulation_limit - self.iterations)
+            self.iterations += max(batch, 0)
+            return max(batch, 0)
+
+    def descend(self, board, rng):
+        """
+        Selects and expands one node, applying virtual loss along the way.
+
+        Returns:
+        - The list of nodes visited from the root to the new leaf.
+        """
+        node = self.root
+        path = [node]
+        while True:
+            expanded = False
+            with self.lock_for(node):
+                if node.is_terminal():
+                    break
+                if node.untried_moves is None:
+                    node.set_untried_moves(board.get_legal_moves())
+                if node.untried_moves:
+                    move = node.pop_untried_move(rng)
+                    child = make_child(node, board, move)
+                    node.add_child(child)
+                    expanded = True
+                elif node.has_children():
+                    child = node.best_child(self.c)
+                    board.make_move(child.move, child.player)
+                else:
+                    break
+            with self.lock_for(child):
+                child.visits += self.virtual_loss
+            path.append(child)
+            node = child
+            if expanded:
+                break
+        return path
+
+    def backup(self, path, result):
+        """
+        Removes the virtual losses of the path and records the real result.
+        """
+        for depth, node in enumerate(path):
+            with self.lock_for(node):
+                node.visits += 1 if depth == 0 else 1 - self.virtual_loss
+                if result == node.player:
+                    node.wins += 1
+                elif result == ".":
+                    node.wins += 0.5
+
+    def search_thread(self, seed, deadline, instruments=None):
+        """
+        Body of one search thread: runs iterations on a private board until the budget is used up.
+        The thread given the instruments reports the statistics of the search after every batch.
+        """
+        board = deepcopy(self.board)
+        rng = random.Random(seed)
+        while True:
+            batch = self.claim_iterations(deadline)
+            if batch == 0:
+                return
+            for _ in range(batch):
+                path = self.descend(board, rng)
+                leaf = path[-1]
+                result = leaf.winner if leaf.is_terminal() else self.rollout(board, other_player(leaf.player), rng)
+                self.backup(path, result)
+                while board.counter > self.root_counter:
+                    board.undo_move()
+            if instruments is not None:
+                instruments.tick()
+
+    def run_search(self, deadline, instruments=None):
+        """
+        Runs the shared-tree search on all threads until the simulation limit or the deadline
+        is reached or stop() is called. The immediate win, book and solver checks of
+        MCTS.search run before it, so best_move works as for the single-threaded search.
+
+        Returns:
+        - The most visited root child.
+        """
+        seeds = [self.rng.getrandbits(32) for _ in range(self.threads)]
+        if self.threads == 1:
+            self.search_thread(seeds[0], deadline, instruments)
+        else:
+            workers = [threading.Thread(target=self.search_thread,
+                                        args=(seed, deadline, instruments if i == 0 else None))
+                       for i, seed in enumerate(seeds)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        return self.current_best()
+
+
+def benchmark_scaling(board, current_player, simulation_limit=4000, thread_counts=(1, 2, 4, 8)):
+    """
+    Measures simulations per second of the single-threaded MCTS and of the
+    tree-parallel search with each number of threads (forcing threads on GIL builds).
+
+    Returns:
+    - A dict mapping "sequential" and each thread count to simulations per second.
+    """
+    results = {}
+    mcts = MCTS(NodeMCTS(board, None), current_player, simulation_limit, seed=0)
+    start = time.perf_counter()
+    mcts.best_move()
+    results["sequential"] = simulation_limit / (time.perf_counter() - start)
+
+    for threads in thread_counts:
+        mcts = TreeParallelMCTS(NodeMCTS(board, None), current_player, simulation_limit,
+                                threads=threads, force_threads=True, seed=0)
+        start = time.perf_counter()
+        mcts.best_move()
+        results[threads] = mcts.iterations / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    from BitBoard import BitBoard
+
+    print(f"GIL enabled: {gil_enabled()}")
+    for name, rate in benchmark_scaling(BitBoard(), "X").items():
+        print(f"{name}: {rate:.0f} simulations/s")